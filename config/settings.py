@@ -37,6 +37,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.TimingMiddleware',  # no-op unless REQUEST_TIMING=1
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,13 +67,60 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-# Database (PostgreSQL via .env)
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Database: SQLite by default, PostgreSQL when DATABASE_ENGINE is set to
+# django.db.backends.postgresql (see .env.example and DEPLOYMENT.md).
+DATABASE_ENGINE = os.getenv("DATABASE_ENGINE", "django.db.backends.sqlite3")
+# seconds a worker keeps its connection between requests (0 = reconnect every request)
+DATABASE_CONN_MAX_AGE = int(os.getenv("DATABASE_CONN_MAX_AGE", "600"))
+
+if DATABASE_ENGINE == "django.db.backends.postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": DATABASE_ENGINE,
+            "NAME": os.getenv("DATABASE_NAME", "mysite_db"),
+            "USER": os.getenv("DATABASE_USER", ""),
+            "PASSWORD": os.getenv("DATABASE_PASSWORD", ""),
+            "HOST": os.getenv("DATABASE_HOST", "localhost"),
+            "PORT": os.getenv("DATABASE_PORT", "5432"),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            # reused connections are pinged before the first query of a request
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {"connect_timeout": int(os.getenv("DATABASE_CONNECT_TIMEOUT", "5"))},
+        }
     }
-}
+    # psycopg3 connection pool (needs Django 5.1+ and `pip install "psycopg[pool]"`);
+    # a pool replaces persistent connections, so CONN_MAX_AGE must be 0
+    if os.getenv("DATABASE_POOL", "0") == "1":
+        import django
+        from django.core.exceptions import ImproperlyConfigured
+        if django.VERSION < (5, 1):
+            raise ImproperlyConfigured("DATABASE_POOL=1 needs Django 5.1+; use DATABASE_CONN_MAX_AGE on this version")
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DATABASE_POOL_MIN", "2")),
+            "max_size": int(os.getenv("DATABASE_POOL_MAX", "10")),
+            "timeout": int(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+        }
+elif DATABASE_ENGINE == "django.db.backends.sqlite3":
+    DATABASES = {
+        "default": {
+            "ENGINE": DATABASE_ENGINE,
+            "NAME": os.getenv("SQLITE_PATH") or BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        }
+    }
+else:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(f"Unsupported DATABASE_ENGINE {DATABASE_ENGINE!r}")
+
+# Applied to every new SQLite connection (core.db). SQLITE_TUNING=0 keeps
+# SQLite's defaults (rollback journal, synchronous=FULL) for comparison.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv("SQLITE_MMAP_MB", "256")) * 1024 * 1024,
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+} if os.getenv("SQLITE_TUNING", "1") == "1" else {}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -102,8 +150,24 @@ CSRF_TRUSTED_ORIGINS = [
     "https://ynltestvpn.click",
     "https://www.ynltestvpn.click",
 ]
-DATA_UPLOAD_MAX_MEMORY_SIZE = 700 * 1024 * 1024
-FILE_UPLOAD_MAX_MEMORY_SIZE = 700 * 1024 * 1024
+# Uploads: files always stream to a temp file in 256 KB chunks (core.uploads),
+# so only regular form fields are buffered in memory.
+FILE_UPLOAD_HANDLERS = ["core.uploads.HashingTemporaryFileUploadHandler"]
+MEDIA_UPLOAD_MAX_BYTES = int(os.getenv("MEDIA_UPLOAD_MAX_MB", "700")) * 1024 * 1024
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # Django default; unused by the handler above
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core": {"handlers": ["console"], "level": os.getenv("CORE_LOG_LEVEL", "INFO")},
+    },
+}
 
 # Site configuration
 SITE_NAME = os.getenv("SITE_NAME", "YNL Tech")
@@ -111,3 +175,67 @@ SITE_URL = os.getenv("SITE_URL", "https://example.com")
 FOOTER_NAME = os.getenv("FOOTER_NAME", "YanNaingLin")
 TELEGRAM_URL = os.getenv("TELEGRAM_URL", "")
 FACEBOOK_URL = os.getenv("FACEBOOK_URL", "")
+
+# Markdown rendering (core.rendering): rendered HTML kept per worker, keyed by content hash
+MARKDOWN_CACHE_SIZE = int(os.getenv("MARKDOWN_CACHE_SIZE", "256"))
+MARKDOWN_BLOCK_CACHE_SIZE = int(os.getenv("MARKDOWN_BLOCK_CACHE_SIZE", "4096"))
+HIGHLIGHT_CACHE_SIZE = int(os.getenv("HIGHLIGHT_CACHE_SIZE", "1024"))
+
+# Public listings (/posts/, /library/): rows per keyset page
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "12"))
+
+# Panel dashboard counts (core.stats): cached this long in the shared "pages" cache
+# alias, dropped on any post/media change (per worker only with PAGE_CACHE_BACKEND=locmem)
+DASHBOARD_STATS_SECONDS = int(os.getenv("DASHBOARD_STATS_SECONDS", "60"))
+
+# Request timing (core.timing): Server-Timing header, a log line per request and
+# per-view percentiles of the last REQUEST_TIMING_SAMPLES requests at /panel/timings/
+REQUEST_TIMING = os.getenv("REQUEST_TIMING", "0") == "1"
+REQUEST_TIMING_SAMPLES = int(os.getenv("REQUEST_TIMING_SAMPLES", "500"))
+
+# Media streaming (core.streaming): when set, /library/.../file/ and track audio
+# responses are handed to nginx via X-Accel-Redirect to this internal location
+# (see DEPLOYMENT.md) instead of being streamed by the gunicorn worker.
+MEDIA_X_ACCEL_PREFIX = os.getenv("MEDIA_X_ACCEL_PREFIX", "")
+
+# Resumable chunked uploads (core.views_uploads): parts are assembled here,
+# then moved into MEDIA_ROOT on finalize. Keep it on the same filesystem.
+CHUNKED_UPLOAD_DIR = os.getenv("CHUNKED_UPLOAD_DIR", str(BASE_DIR / "upload_parts"))
+CHUNKED_UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+CHUNKED_UPLOAD_EXPIRE_HOURS = 24
+
+# Waveform peaks (core.waveform): decoder binary (found on PATH if empty) and
+# whether to build peaks on a background thread after upload (off = inline).
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "")
+WAVEFORM_BACKGROUND = os.getenv("WAVEFORM_BACKGROUND", "1") == "1"
+
+# Full-page cache for anonymous public pages (core.pagecache). Backend:
+#   file   - shared by all workers on this host (default)
+#   locmem - per worker; purges only reach one worker, so single-worker/dev only
+#   redis  - any Redis-compatible server at PAGE_CACHE_URL (needs the redis package)
+# Keys include the deploy version (DEPLOY_VERSION, else the git commit; core.deploy),
+# so pages cached before a deploy are never served after it.
+DEPLOY_VERSION = os.getenv("DEPLOY_VERSION", "")
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_BACKEND = os.getenv("PAGE_CACHE_BACKEND", "file")
+PAGE_CACHE_SECONDS = int(os.getenv("PAGE_CACHE_SECONDS", "86400"))
+_PAGE_CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pages",
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("PAGE_CACHE_DIR", str(BASE_DIR / "page_cache")),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("PAGE_CACHE_URL", "redis://127.0.0.1:6379/1"),
+    },
+}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "pages": _PAGE_CACHE_BACKENDS[PAGE_CACHE_BACKEND],
+}
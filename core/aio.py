@@ -0,0 +1,48 @@
+"""Helpers for the async public views (home, posts, media list / detail).
+
+Under uvicorn workers (see DEPLOYMENT.md, "ASGI workers") these views run on
+the event loop, so a request waiting on the database or a slow client doesn't
+hold a whole worker. Django 4.2 has async QuerySet methods (``aget``,
+``aupdate``, ``async for``) but still runs each query in the request's sync
+thread; templates, the session user and ``login_required`` are sync-only, so
+they go through ``sync_to_async`` here. Under WSGI (gunicorn sync workers, the
+test client) Django runs the same views with ``async_to_sync``.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+arender = sync_to_async(render)
+
+
+def _load_user(request):
+    request.user.is_authenticated  # evaluates the lazy user (session + user queries)
+    return request.user
+
+
+async def auser(request):
+    """``request.user``, loaded without touching the database from the event loop."""
+    return await sync_to_async(_load_user)(request)
+
+
+async def aget_object_or_404(qs, **kwargs):
+    try:
+        return await qs.aget(**kwargs)
+    except qs.model.DoesNotExist:
+        raise Http404(f"No {qs.model._meta.object_name} matches the given query.")
+
+
+def login_required(login_url):
+    """``django.contrib.auth.decorators.login_required`` for async views."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            user = await auser(request)
+            if not user.is_authenticated:
+                return redirect_to_login(request.get_full_path(), login_url)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
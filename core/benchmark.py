@@ -0,0 +1,285 @@
+"""Benchmark harness for the hot views (used by ``manage.py benchmark``).
+
+``seed()`` fills the (test) database with a deterministic synthetic dataset:
+posts with realistic Markdown (headings, lists, tables, admonitions, fenced
+code), audio items with many tracks, and staff users (every third an Editor).
+``run()`` drives each scenario through the Django test client and reports
+latency percentiles, queries per request and peak Python memory allocated per
+request (tracemalloc, measured in a separate pass so it doesn't skew timings).
+Results are plain dicts so they can be saved as a baseline JSON file and
+compared against later runs with ``compare()``.
+"""
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from .timing import percentile
+
+BENCH_PASSWORD = "!"  # unusable; clients log in with force_login
+
+_WORDS = (
+    "django query cache index page render template markdown audio track worker "
+    "request latency python server database nginx stream upload slug panel "
+    "editor media library post search memory benchmark မင်္ဂလာပါ ဆရာ သင်ခန်းစာ"
+).split()
+
+_CODE = {
+    "python": (
+        "def handler(request, slug):\n"
+        "    post = get_object_or_404(Post, slug=slug)\n"
+        "    for i, line in enumerate(post.content.splitlines()):\n"
+        "        if line.startswith('#'):\n"
+        "            yield i, line.lstrip('# ')\n"
+    ),
+    "javascript": (
+        "async function load(url) {\n"
+        "  const res = await fetch(url, { headers: { Accept: 'application/json' } });\n"
+        "  if (!res.ok) throw new Error(`HTTP ${res.status}`);\n"
+        "  return (await res.json()).tracks.map(t => t.url);\n"
+        "}\n"
+    ),
+    "bash": (
+        "cd /opt/mysite && source .venv/bin/activate\n"
+        "python3 manage.py migrate --noinput\n"
+        "systemctl restart mysite.service\n"
+    ),
+    "sql": (
+        "SELECT id, title FROM core_post\n"
+        " WHERE status = 'published'\n"
+        " ORDER BY published_at DESC, id DESC LIMIT 12;\n"
+    ),
+}
+
+
+def _sentence(rng, words=(8, 20)):
+    text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(*words)))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 6)))
+
+
+def markdown_document(rng, sections=None):
+    """A post-like Markdown document of a few KB."""
+    parts = [_paragraph(rng)]
+    for n in range(sections or rng.randint(3, 7)):
+        parts.append(f"## {_sentence(rng, (2, 6))[:-1]} {n + 1}")
+        parts.append(_paragraph(rng))
+        block = rng.randrange(5)
+        if block == 0:
+            lang = rng.choice(sorted(_CODE))
+            parts.append(f"```{lang}\n{_CODE[lang]}```")
+        elif block == 1:
+            parts.append("\n".join(f"- {_sentence(rng, (3, 9))}" for _ in range(rng.randint(3, 6))))
+        elif block == 2:
+            rows = "\n".join(
+                f"| {rng.choice(_WORDS)} | {rng.randint(1, 999)} | {rng.choice(_WORDS)} |" for _ in range(rng.randint(2, 6))
+            )
+            parts.append(f"| Name | Value | Note |\n|---|---|---|\n{rows}")
+        elif block == 3:
+            parts.append(f'!!! note "Note"\n    {_sentence(rng)}')
+        else:
+            parts.append("\n".join(f"- [{rng.choice(' x')}] {_sentence(rng, (3, 7))}" for _ in range(3)))
+    return "\n\n".join(parts) + "\n"
+
+
+# ===== Seeding =====
+@dataclass
+class Dataset:
+    admin: User
+    post_slugs: list
+    media_slugs: list
+    preview_texts: list
+
+
+def seed(posts=2000, media=100, tracks=30, staff=200, seed_value=1, log=None):
+    from .models import Post
+    from .models_media import MediaItem, MediaTrack
+    from .search import rebuild_index
+
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    say = log or (lambda msg: None)
+
+    admin = User.objects.create_superuser("bench-admin", "bench@example.com", BENCH_PASSWORD)
+    editors, _ = Group.objects.get_or_create(name="Editor")
+    users = User.objects.bulk_create([
+        User(username=f"bench-staff-{i}", email=f"staff{i}@example.com", is_staff=True,
+             password=BENCH_PASSWORD, date_joined=now - timedelta(days=i))
+        for i in range(staff)
+    ])
+    User.groups.through.objects.bulk_create([
+        User.groups.through(user_id=u.pk, group_id=editors.pk) for u in users[::3]
+    ])
+    say(f"{staff} staff users")
+
+    rows = []
+    for i in range(posts):
+        published = rng.random() < 0.9
+        post = Post(
+            title=_sentence(rng, (3, 8))[:-1],
+            slug=f"bench-post-{i}",
+            content=markdown_document(rng),
+            status="published" if published else "draft",
+            author=admin,
+            published_at=now - timedelta(hours=i) if published else None,
+        )
+        post.render_content()
+        rows.append(post)
+    Post.objects.bulk_create(rows, batch_size=500)
+    say(f"{posts} posts")
+
+    items = MediaItem.objects.bulk_create([
+        MediaItem(
+            title=_sentence(rng, (2, 6))[:-1], slug=f"bench-media-{i}", kind="audio",
+            status="published", description=_paragraph(rng), published_at=now - timedelta(hours=i),
+            track_count=tracks, tracks_bytes=tracks * 4_000_000,
+        )
+        for i in range(media)
+    ], batch_size=500)
+    MediaTrack.objects.bulk_create([
+        MediaTrack(
+            item=item, title=_sentence(rng, (2, 5))[:-1], order=n + 1,
+            audio_file=f"library_tracks/bench/{item.pk}-{n + 1}.mp3",
+            duration=rng.uniform(60, 900), bitrate=128, sample_rate=44100, channels=2,
+            size=4_000_000,
+        )
+        for item in items for n in range(tracks)
+    ], batch_size=1000)
+    say(f"{media} media items x {tracks} tracks")
+
+    rebuild_index()
+
+    published_slugs = [p.slug for p in rows if p.status == "published"]
+    return Dataset(
+        admin=admin,
+        post_slugs=published_slugs,
+        media_slugs=[m.slug for m in items],
+        preview_texts=[p.content for p in rows[:50]],
+    )
+
+
+# ===== Scenarios =====
+def scenarios(data):
+    """(name, logged_in, method, request(i) -> (path, post_data))"""
+    def cycle(values, fmt):
+        return lambda i: (fmt.format(values[i % len(values)]), None)
+
+    def preview(i):
+        # a new edit on every request, like typing in the editor (no cache hit)
+        text = data.preview_texts[i % len(data.preview_texts)] + f"\nEdit {i}.\n"
+        return "/panel/md-preview/", {"text": text}
+
+    return [
+        ("home", False, "get", lambda i: ("/", None)),
+        ("posts_list", True, "get", lambda i: ("/posts/", None)),
+        ("post_detail", True, "get", cycle(data.post_slugs, "/posts/{}/")),
+        ("md_preview", True, "post", preview),
+        ("media_list", False, "get", lambda i: ("/library/", None)),
+        ("media_detail", False, "get", cycle(data.media_slugs, "/library/item/{}/")),
+        ("panel_dashboard", True, "get", lambda i: ("/panel/", None)),
+        ("panel_posts", True, "get", lambda i: ("/panel/posts/", None)),
+        ("panel_media", True, "get", lambda i: ("/panel/media/", None)),
+        ("panel_users", True, "get", lambda i: ("/panel/users/", None)),
+    ]
+
+
+def _request(client, method, path, post_data):
+    response = getattr(client, method)(path, post_data) if post_data else getattr(client, method)(path)
+    if response.status_code != 200:
+        raise RuntimeError(f"{method.upper()} {path} returned {response.status_code}")
+    return response
+
+
+def run(data, requests=50, warmup=5, memory_requests=5, only=None):
+    anonymous = Client()
+    staff = Client()
+    staff.force_login(data.admin)
+
+    results = {}
+    for name, logged_in, method, make in scenarios(data):
+        if only and name not in only:
+            continue
+        client = staff if logged_in else anonymous
+        for i in range(warmup):
+            _request(client, method, *make(i))
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        times = []
+        with connection.execute_wrapper(count):
+            for i in range(warmup, warmup + requests):
+                path, post_data = make(i)
+                started = time.perf_counter()
+                _request(client, method, path, post_data)
+                times.append((time.perf_counter() - started) * 1000)
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for i in range(warmup + requests, warmup + requests + memory_requests):
+                path, post_data = make(i)
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                _request(client, method, path, post_data)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        times.sort()
+        results[name] = {
+            "requests": requests,
+            "p50_ms": round(percentile(times, 50), 2),
+            "p90_ms": round(percentile(times, 90), 2),
+            "p99_ms": round(percentile(times, 99), 2),
+            "mean_ms": round(sum(times) / len(times), 2),
+            "queries": round(queries / requests, 2),
+            "peak_kb": round(peak / 1024, 1),
+        }
+    return results
+
+
+# ===== Baselines =====
+def save_baseline(path, results, params):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"params": params, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=20):
+    """Rows of (name, metric, before, after, change %, regressed) for shared scenarios.
+
+    Latency regresses when p50/p90 grow by more than ``tolerance`` percent,
+    queries and peak memory when they grow at all / by more than ``tolerance``.
+    """
+    rows = []
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        for metric, limit in (("p50_ms", tolerance), ("p90_ms", tolerance), ("queries", 0), ("peak_kb", tolerance)):
+            old, new = before.get(metric), now[metric]
+            if old is None:
+                continue
+            change = ((new - old) / old * 100) if old else (0.0 if new == old else 100.0)
+            rows.append((name, metric, old, new, change, change > limit))
+    return rows
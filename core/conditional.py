@@ -0,0 +1,95 @@
+"""Conditional GET for public pages.
+
+``@conditional(stamp)`` runs ``stamp(request, *args, **kwargs)`` -- one small
+query returning ``(last_modified, extra)`` or None -- before the view, derives
+ETag / Last-Modified from it and answers ``304 Not Modified`` without running
+the view (what Django's ``condition`` does, which in 4.2 can't wrap async
+views; for those the stamp query runs through ``sync_to_async``). Responses get
+``Cache-Control: max-age=0, must-revalidate`` (public for anonymous visitors,
+private once logged in, since the nav shows the user) so browsers and nginx
+keep the page and revalidate it cheaply. The ETag includes the deploy version
+(core.deploy), so a deploy that only changes templates or CSS still gets
+fresh pages; browsers send If-None-Match with the ETag, which takes precedence
+over If-Modified-Since.
+"""
+import asyncio
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import deploy
+
+
+def _user_key(request):
+    return request.user.pk if request.user.is_authenticated else 0
+
+
+def conditional(stamp):
+    def decorator(view):
+        def validators(request, *args, **kwargs):
+            """-> (ETag, Last-Modified timestamp), both None without a stamp."""
+            user_key = _user_key(request)
+            value = stamp(request, *args, **kwargs)
+            if value is None:
+                return None, None
+            last_modified, extra = value
+            raw = (
+                f"{view.__module__}.{view.__name__}|{deploy.version()}|"
+                f"{last_modified.timestamp()}|{extra}|{user_key}"
+            )
+            if not timezone.is_aware(last_modified):
+                last_modified = timezone.make_aware(last_modified, datetime.timezone.utc)
+            return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]), int(last_modified.timestamp())
+
+        def finish(request, response, etag, last_modified):
+            # the same headers django.views.decorators.http.condition sets
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            if response.status_code in (200, 304) and response.has_header("ETag"):
+                scope = {"private": True} if request.user.is_authenticated else {"public": True}
+                patch_cache_control(response, max_age=0, must_revalidate=True, **scope)
+            return response
+
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                etag, last_modified = await sync_to_async(validators)(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                etag, last_modified = validators(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return finish(request, response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+# ===== Stamps =====
+def listing_stamp(qs):
+    """Newest updated_at + row count of ``qs`` (the count catches deletions)."""
+    row = qs.aggregate(last=Max("updated_at"), n=Count("id"))
+    if row["last"] is None:
+        return None
+    return row["last"], row["n"]
+
+
+def row_stamp(qs, extra=""):
+    last = qs.values_list("updated_at", flat=True).first()
+    if last is None:
+        return None
+    return last, extra
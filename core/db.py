@@ -0,0 +1,21 @@
+"""Per-connection database setup.
+
+SQLite connections get ``settings.SQLITE_PRAGMAS`` as soon as they open:
+WAL (readers keep going while an upload or save writes), synchronous=NORMAL
+(durable with WAL; fsync happens at checkpoints instead of every commit),
+memory-mapped reads and a busy timeout, so a second writer waits for the lock
+instead of failing with "database is locked". ``journal_mode`` is stored in the
+database file; the others only last for the connection.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+        # straight on the sqlite3 connection: not worth a trip through query logging
+        connection.connection.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,34 @@
+"""Deploy version: changes whenever new code, templates or static files go live.
+
+Mixed into the page cache keys (core.pagecache) and the conditional-GET
+validators (core.conditional), so a deploy that only changes markup or CSS
+doesn't keep serving old pages from the cache or as 304s. ``DEPLOY_VERSION``
+in ``.env`` wins; otherwise it is the checked-out git commit (deploys are
+``git pull`` + restart, see DEPLOYMENT.md), read once per worker.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+
+def _git_head(base):
+    git = Path(base) / ".git"
+    try:
+        head = (git / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head  # detached checkout
+        ref = head[len("ref: "):]
+        if (git / ref).exists():
+            return (git / ref).read_text().strip()
+        for line in (git / "packed-refs").read_text().splitlines():
+            if line.endswith(" " + ref):
+                return line.split()[0]
+    except OSError:
+        pass
+    return ""
+
+
+@lru_cache(maxsize=None)
+def version():
+    return getattr(settings, "DEPLOY_VERSION", "") or _git_head(settings.BASE_DIR)[:12]
@@ -1,7 +1,10 @@
 from django import forms
-from .models_media import MediaItem
+from .models_media import MediaItem, UploadSession
 
 class MediaItemForm(forms.ModelForm):
+    # id of a finished chunked upload (views_uploads) to use instead of `file`
+    upload_id = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = MediaItem
         fields = ["title","slug","kind","status","video_url","file","cover_image","description"]
@@ -15,6 +18,14 @@ class MediaItemForm(forms.ModelForm):
         file = cleaned.get("file")
         video_url = cleaned.get("video_url","").strip()
 
+        self.upload = None
+        upload_id = cleaned.get("upload_id")
+        if upload_id:
+            self.upload = UploadSession.objects.filter(pk=upload_id, target="media_file", status="complete").first()
+            if self.upload is None:
+                raise forms.ValidationError("Upload မပြီးသေးပါ (or expired) — file ကိုပြန်တင်ပါ။")
+            file = file or self.upload
+
         if kind == "audio":
             if not file:
                 raise forms.ValidationError("Audio (MP3) အတွက် File ထည့်ပါ။")
@@ -22,3 +33,9 @@ class MediaItemForm(forms.ModelForm):
             if not file and not video_url:
                 raise forms.ValidationError("Video အတွက် YouTube/Vimeo URL သို့မဟုတ် MP4 file တစ်ခုခုထည့်ပါ။")
         return cleaned
+
+    def save(self, commit=True):
+        item = super().save(commit=commit)
+        if commit and getattr(self, "upload", None):
+            self.upload.attach(item=item)
+        return item
@@ -0,0 +1,98 @@
+"""Pygments highlight cache for fenced / indented code blocks.
+
+Python-Markdown's fenced_code and codehilite extensions look up ``CodeHilite``
+from their module globals for every code block, so swapping in a caching
+subclass there makes every render (post pages, preview, preview blocks) share
+one per-worker cache. Keys cover language, code hash and formatter options, so
+anything that changes the output also changes the key.
+"""
+import threading
+import time
+
+from django.conf import settings
+from markdown.extensions import codehilite, fenced_code
+
+from .rendering import LRUCache, content_hash
+
+_cache = LRUCache(getattr(settings, "HIGHLIGHT_CACHE_SIZE", 1024))
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0   # time spent actually highlighting
+        self.saved_seconds = 0.0  # highlight time skipped thanks to hits
+
+    def hit(self, cost):
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += cost
+
+    def miss(self, cost):
+        with self._lock:
+            self.misses += 1
+            self.miss_seconds += cost
+
+
+_stats = _Stats()
+
+
+class CachedCodeHilite(codehilite.CodeHilite):
+    def _cache_key(self, shebang):
+        formatter = self.pygments_formatter
+        if not isinstance(formatter, str):
+            formatter = f"{formatter.__module__}.{formatter.__qualname__}"
+        return (
+            self.lang,
+            shebang,
+            self.guess_lang,
+            self.use_pygments,
+            self.lang_prefix,
+            formatter,
+            repr(sorted(self.options.items())),
+            content_hash(self.src),
+        )
+
+    def hilite(self, shebang=True):
+        key = self._cache_key(shebang)
+        cached = _cache.get(key)
+        if cached is not None:
+            html, cost = cached
+            _stats.hit(cost)
+            return html
+
+        started = time.perf_counter()
+        html = super().hilite(shebang)
+        cost = time.perf_counter() - started
+        _stats.miss(cost)
+        _cache.set(key, (html, cost))
+        return html
+
+
+def install():
+    """Make Python-Markdown build CachedCodeHilite instead of CodeHilite (idempotent)."""
+    fenced_code.CodeHilite = CachedCodeHilite
+    codehilite.CodeHilite = CachedCodeHilite
+
+
+def stats():
+    total = _stats.hits + _stats.misses
+    return {
+        "hits": _stats.hits,
+        "misses": _stats.misses,
+        "hit_rate": (_stats.hits / total) if total else 0.0,
+        "entries": len(_cache),
+        "max_entries": _cache.maxsize,
+        "highlight_seconds": round(_stats.miss_seconds, 4),
+        "saved_seconds": round(_stats.saved_seconds, 4),
+    }
+
+
+def clear():
+    _cache.clear()
+    _stats.reset()
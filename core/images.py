@@ -0,0 +1,134 @@
+"""Cover image derivatives (Pillow).
+
+For each uploaded cover we store a few downscaled WebP + JPEG copies next to
+the original (``<dir>/derived/``), EXIF-free and already rotated upright, and
+record them in the model's ``cover_meta`` JSON:
+
+    {"src": "<original name>", "width": 4032, "height": 3024,
+     "variants": [{"w": 360, "h": 270, "webp": "<name>", "jpeg": "<name>"}, ...]}
+
+The original itself stays publicly reachable (it is the <img> fallback and
+lives under MEDIA_URL), so it is rewritten without EXIF / XMP / comments in the
+same pass; a JPEG that needs no rotation keeps its quantization tables, so it
+isn't visibly recompressed.
+
+The ``cover_img`` template tag (templatetags/image_tags.py) turns that into
+srcset/width/height/loading="lazy" markup.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+COVER_WIDTHS = (360, 720, 1080, 1600)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+ORIGINAL_QUALITY = 95  # re-encoding a rotated JPEG / lossy WebP original
+# what can carry GPS position, camera serial numbers, editing history
+_METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        if img.mode == "RGBA":
+            # JPEG has no alpha: flatten onto white instead of black
+            bg = Image.new("RGB", img.size, (255, 255, 255))
+            bg.paste(img, mask=img.getchannel("A"))
+            img = bg
+        img.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        img.save(buf, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def strip_original(field_file, img):
+    """Rewrite the stored original without metadata. ``img`` is it as opened (not transposed)."""
+    fmt = img.format
+    if fmt not in ("JPEG", "PNG", "WEBP") or not any(img.info.get(k) for k in _METADATA_KEYS):
+        return False
+    options = {"icc_profile": img.info["icc_profile"]} if img.info.get("icc_profile") else {}
+    if fmt == "JPEG" and img.getexif().get(ExifTags.Base.Orientation, 1) == 1:
+        out = img
+        options.update(quality="keep", comment=b"")
+    else:
+        # dropping EXIF drops the orientation tag too: bake the rotation into the pixels
+        out = ImageOps.exif_transpose(img)
+        if fmt == "JPEG":
+            options.update(quality=ORIGINAL_QUALITY, comment=b"")
+        elif fmt == "WEBP":
+            options.update(quality=ORIGINAL_QUALITY, lossless=bool(img.info.get("lossless")))
+    buf = io.BytesIO()
+    out.save(buf, fmt, **options)
+    with field_file.storage.open(field_file.name, "wb") as f:
+        f.write(buf.getvalue())
+    return True
+
+
+def delete_derivatives(meta, storage=default_storage):
+    for v in (meta or {}).get("variants", []):
+        for key in ("webp", "jpeg"):
+            name = v.get(key)
+            if name:
+                try:
+                    storage.delete(name)
+                except OSError:
+                    pass
+
+
+def build_derivatives(field_file):
+    """Generate resized copies of ``field_file``; returns the cover_meta dict.
+
+    An unreadable image gets ``{"src": name}`` so it isn't retried on every save.
+    """
+    try:
+        with field_file.open("rb") as f:
+            img = Image.open(f)
+            img.load()
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        logger.warning("cover derivatives skipped for %s: %s", field_file.name, e)
+        return {"src": field_file.name}
+
+    try:
+        strip_original(field_file, img)
+    except (OSError, ValueError) as e:
+        logger.warning("could not strip metadata from %s: %s", field_file.name, e)
+
+    # apply EXIF orientation, then drop all metadata by re-encoding pixels only
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+    width, height = img.size
+
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+
+    variants = []
+    widths = [w for w in COVER_WIDTHS if w < width] + [min(width, COVER_WIDTHS[-1])]
+    for w in sorted(set(widths)):
+        h = max(1, round(height * w / width))
+        resized = img if w == width else img.resize((w, h), Image.LANCZOS)
+        variant = {"w": w, "h": h}
+        for key, fmt, ext in (("webp", "WEBP", "webp"), ("jpeg", "JPEG", "jpg")):
+            name = os.path.join(directory, "derived", f"{stem}-{w}.{ext}")
+            variant[key] = field_file.storage.save(name, ContentFile(_encode(resized, fmt)))
+        variants.append(variant)
+
+    return {"src": field_file.name, "width": width, "height": height, "variants": variants}
+
+
+def refresh_cover(instance, force=False):
+    """Rebuild instance.cover_meta if the cover changed; returns True if it was updated."""
+    meta = instance.cover_meta or {}
+    current = instance.cover_image.name if instance.cover_image else ""
+    if not force and meta.get("src", "") == current:
+        return False
+
+    delete_derivatives(meta, instance.cover_image.storage)
+    instance.cover_meta = build_derivatives(instance.cover_image) if current else {}
+    return True
@@ -0,0 +1,149 @@
+"""Concurrent-connection load test against a running server (``manage.py loadtest``).
+
+Two kinds of clients run at the same time:
+
+* ``slow`` clients download ``slow_path`` (a media file) through a tiny
+  receive buffer at ``slow_rate`` bytes/s, like phones on a bad connection.
+  Each keeps its connection open for the whole run.
+* ``concurrency`` page clients request ``paths`` in a loop, one connection per
+  request, and record how long each answer took.
+
+A sync gunicorn worker is tied up for as long as one slow download lasts, so
+once there are as many slow clients as workers the page clients only see
+timeouts; with uvicorn workers they keep getting answers. Plain asyncio
+sockets, no extra dependencies.
+"""
+import asyncio
+import socket
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from .timing import percentile
+
+SLOW_BUFFER = 4096
+
+
+@dataclass
+class Result:
+    duration: float = 0.0
+    latencies: list = field(default_factory=list)
+    statuses: dict = field(default_factory=dict)
+    errors: int = 0
+    timeouts: int = 0
+    slow_streaming: int = 0
+    slow_failed: int = 0
+    slow_bytes: int = 0
+
+    def summary(self):
+        times = sorted(self.latencies)
+        return {
+            "requests": len(times),
+            "rps": round(len(times) / self.duration, 1) if self.duration else 0.0,
+            "p50_ms": round(percentile(times, 50) * 1000, 1),
+            "p90_ms": round(percentile(times, 90) * 1000, 1),
+            "p99_ms": round(percentile(times, 99) * 1000, 1),
+            "max_ms": round((times[-1] if times else 0) * 1000, 1),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "slow_streaming": self.slow_streaming,
+            "slow_failed": self.slow_failed,
+            "slow_kb": self.slow_bytes // 1024,
+        }
+
+
+async def fetch(host, port, host_header, path, rate=None, stop=None):
+    """GET ``path`` -> (status, body bytes read). With ``rate`` read that many bytes/s until ``stop`` is set."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if rate:
+        # small kernel and StreamReader buffers, so the server really waits on us
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_BUFFER)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    except OSError:
+        sock.close()
+        raise
+    reader, writer = await asyncio.open_connection(sock=sock, limit=SLOW_BUFFER if rate else 2 ** 16)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host_header}\r\nUser-Agent: loadtest\r\n"
+            f"Connection: close\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before the response")
+        status = int(status_line.split()[1])
+        received = 0
+        while not (stop and stop.is_set()):
+            chunk = await reader.read(SLOW_BUFFER if rate else 2 ** 16)
+            if not chunk:
+                break
+            received += len(chunk)
+            if rate:
+                await asyncio.sleep(len(chunk) / rate)
+        return status, received
+    finally:
+        writer.close()
+
+
+async def run(base_url, paths, concurrency=50, duration=20.0, timeout=5.0,
+              slow=0, slow_path="", slow_rate=16 * 1024, slow_head_start=1.0):
+    parts = urlsplit(base_url)
+    host, port = parts.hostname, parts.port or 80
+    result = Result()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    async def slow_client():
+        try:
+            status, received = await fetch(host, port, parts.netloc, slow_path, rate=slow_rate, stop=stop)
+        except (OSError, ValueError, IndexError):
+            result.slow_failed += 1
+            return
+        result.slow_bytes += received
+        if status >= 400 or not received or not stop.is_set():
+            # an error page, a download only started once the run was over
+            # (queued behind busy workers), or one the server ended early
+            result.slow_failed += 1
+        else:
+            result.slow_streaming += 1
+
+    async def page_client(offset, end):
+        n = offset
+        while loop.time() < end:
+            path = paths[n % len(paths)]
+            n += 1
+            started = time.perf_counter()
+            try:
+                status, _ = await asyncio.wait_for(fetch(host, port, parts.netloc, path), timeout)
+            except asyncio.TimeoutError:
+                result.timeouts += 1
+                continue
+            except (OSError, ValueError, IndexError):
+                result.errors += 1
+                await asyncio.sleep(0.05)  # refused / reset: don't spin
+                continue
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+            if status >= 400:
+                result.errors += 1
+            else:
+                result.latencies.append(time.perf_counter() - started)
+
+    slow_tasks = [asyncio.create_task(slow_client()) for _ in range(slow)]
+    if slow:
+        # let the downloads take their connections (and, with sync workers, the workers) first
+        await asyncio.sleep(slow_head_start)
+    started = loop.time()
+    await asyncio.gather(*(page_client(i, started + duration) for i in range(concurrency)))
+    result.duration = loop.time() - started
+    stop.set()
+    if slow_tasks:
+        # a slow client stuck in a read notices ``stop`` after its next chunk
+        done, pending = await asyncio.wait(slow_tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        result.slow_failed += len(pending)
+    return result
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Post
+
+
+class Command(BaseCommand):
+    help = "Fill Post.excerpt / reading_time for existing posts (renders stale HTML first)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="recompute even posts that already have an excerpt")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        qs = Post.objects.order_by("id")
+        if not options["all"]:
+            qs = qs.filter(excerpt="").exclude(content="")
+
+        updated = 0
+        batch = []
+        for post in qs.iterator(chunk_size=batch_size):
+            # render_content() already refreshes the excerpt when it re-renders
+            if not post.render_content():
+                post.refresh_excerpt()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                Post.objects.bulk_update(batch, Post.RENDER_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Post.objects.bulk_update(batch, Post.RENDER_FIELDS)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} posts updated"))
@@ -0,0 +1,115 @@
+import os
+import platform
+import resource
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with synthetic posts / media / users, time the hot "
+        "views through the test client and optionally compare against a baseline file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=2000)
+        parser.add_argument("--media", type=int, default=100, help="audio items")
+        parser.add_argument("--tracks", type=int, default=30, help="tracks per media item")
+        parser.add_argument("--staff", type=int, default=200, help="staff users")
+        parser.add_argument("--seed", type=int, default=1, help="random seed for the dataset")
+        parser.add_argument("--requests", type=int, default=50, help="timed requests per view")
+        parser.add_argument("--warmup", type=int, default=5, help="untimed requests per view first")
+        parser.add_argument("--only", nargs="+", metavar="VIEW", help="run only these scenarios")
+        parser.add_argument("--page-cache", action="store_true",
+                            help="keep the anonymous page cache on (default: off, to time the views)")
+        parser.add_argument("--db-file", help="SQLite: put the test database in this file instead of memory")
+        parser.add_argument("--baseline", help="compare with this baseline JSON file")
+        parser.add_argument("--save-baseline", metavar="PATH", help="write these results as a baseline")
+        parser.add_argument("--tolerance", type=float, default=20.0,
+                            help="allowed latency / memory growth in percent before flagging (default 20)")
+        parser.add_argument("--check", action="store_true", help="exit with an error if anything regressed")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = benchmark.load_baseline(options["baseline"])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"can't read baseline {options['baseline']}: {e}")
+
+        params = {k: options[k] for k in ("posts", "media", "tracks", "staff", "seed", "requests", "warmup", "page_cache")}
+        params.update(
+            database=connection.vendor,
+            db_file=bool(options["db_file"]),
+            python=platform.python_version(),
+        )
+
+        if options["db_file"]:
+            if connection.vendor != "sqlite":
+                raise CommandError("--db-file only applies to SQLite")
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.abspath(options["db_file"])
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                PAGE_CACHE_ENABLED=options["page_cache"],
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                WAVEFORM_BACKGROUND=False,
+            ):
+                self.stdout.write("Seeding...")
+                data = benchmark.seed(
+                    posts=options["posts"], media=options["media"], tracks=options["tracks"],
+                    staff=options["staff"], seed_value=options["seed"],
+                    log=lambda msg: self.stdout.write(f"  {msg}"),
+                )
+                self.stdout.write(f"Timing {options['requests']} requests per view...")
+                try:
+                    results = benchmark.run(
+                        data, requests=options["requests"], warmup=options["warmup"], only=options["only"],
+                    )
+                except RuntimeError as e:
+                    raise CommandError(str(e))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results)
+        self.stdout.write(f"process peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB")
+
+        if options["save_baseline"]:
+            benchmark.save_baseline(options["save_baseline"], results, params)
+            self.stdout.write(self.style.SUCCESS(f"baseline written to {options['save_baseline']}"))
+
+        if baseline is not None:
+            if baseline.get("params") != params:
+                self.stdout.write(self.style.WARNING(f"baseline was recorded with different parameters: {baseline.get('params')}"))
+            rows = benchmark.compare(results, baseline, tolerance=options["tolerance"])
+            regressed = self.report_comparison(rows)
+            if regressed and options["check"]:
+                raise CommandError(f"{regressed} metrics regressed against {options['baseline']}")
+
+    def report(self, results):
+        header = f"{'view':<18}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'queries':>10}{'peak KB':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<18}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                f"{r['mean_ms']:>10.2f}{r['queries']:>10.1f}{r['peak_kb']:>10.1f}"
+            )
+
+    def report_comparison(self, rows):
+        regressed = 0
+        self.stdout.write("\nvs baseline:")
+        for name, metric, old, new, change, bad in rows:
+            line = f"  {name:<18}{metric:<9}{old:>10}{new:>10}{change:>+9.1f}%"
+            if bad:
+                regressed += 1
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
+        return regressed
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core import signals
+from core.models import Post
+from core.models_media import MediaItem
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/JPEG cover derivatives for existing posts and media items"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="rebuild even covers that already have derivatives")
+
+    def handle(self, *args, **options):
+        for model in (Post, MediaItem):
+            updated = 0
+            qs = model.objects.exclude(cover_image="").exclude(cover_image=None).only("id", "cover_image", "cover_meta")
+            for obj in qs.iterator(chunk_size=100):
+                # bumps updated_at (ETag / Last-Modified) and purges the cached pages
+                if signals.rebuild_cover(model, obj, force=options["force"]):
+                    updated += 1
+            self.stdout.write(self.style.SUCCESS(f"{model.__name__}: {updated} covers processed"))
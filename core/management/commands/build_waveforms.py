@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core import waveform
+from core.models_media import MediaItem, MediaTrack
+
+
+class Command(BaseCommand):
+    help = "Build waveform peaks files for audio tracks and audio media items that don't have one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="rebuild existing peaks files too")
+
+    def handle(self, *args, **options):
+        files = [t.audio_file for t in MediaTrack.objects.exclude(audio_file="").defer("seek_index").iterator()]
+        files += [m.file for m in MediaItem.objects.filter(kind="audio").exclude(file="").exclude(file=None).iterator()]
+
+        built = skipped = 0
+        for field_file in files:
+            if not options["force"] and waveform.has_peaks(field_file):
+                continue
+            if waveform.build_peaks(field_file) is None:
+                skipped += 1
+            else:
+                built += 1
+        self.stdout.write(self.style.SUCCESS(f"{built} waveforms built, {skipped} skipped (no decoder / unreadable)"))
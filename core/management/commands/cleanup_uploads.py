@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models_media import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions (and their part files) that were abandoned or already attached"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.CHUNKED_UPLOAD_EXPIRE_HOURS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff) | UploadSession.objects.filter(status="attached")
+        count = 0
+        for session in stale:
+            session.discard_part()
+            session.delete()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} upload sessions removed"))
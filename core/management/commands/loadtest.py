@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Hit a running server with many concurrent page requests while slow clients download "
+        "a media file, and report latency, timeouts and how many downloads stayed open"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="server to test, e.g. http://127.0.0.1:8001")
+        parser.add_argument("--path", dest="paths", action="append", metavar="PATH",
+                            help="page to request (repeatable, default: /)")
+        parser.add_argument("--concurrency", type=int, default=50, help="page clients")
+        parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+        parser.add_argument("--timeout", type=float, default=5.0, help="seconds before a page request counts as timed out")
+        parser.add_argument("--slow", type=int, default=0, help="slow download clients")
+        parser.add_argument("--slow-path", default="", help="file they download, e.g. /library/item/<slug>/file/")
+        parser.add_argument("--slow-rate", type=int, default=16, help="KB/s per slow client (default 16)")
+        parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+
+    def handle(self, *args, **options):
+        if not options["url"].startswith("http://"):
+            raise CommandError("only plain http:// URLs are supported; point it at gunicorn / uvicorn, not nginx TLS")
+        if options["slow"] and not options["slow_path"]:
+            raise CommandError("--slow needs --slow-path")
+
+        result = asyncio.run(loadtest.run(
+            options["url"], options["paths"] or ["/"],
+            concurrency=options["concurrency"], duration=options["duration"], timeout=options["timeout"],
+            slow=options["slow"], slow_path=options["slow_path"], slow_rate=options["slow_rate"] * 1024,
+        ))
+        summary = result.summary()
+        if options["json"]:
+            self.stdout.write(json.dumps(summary))
+            return
+
+        self.stdout.write(
+            f"{summary['requests']} page requests in {result.duration:.1f}s ({summary['rps']}/s), "
+            f"{options['concurrency']} clients"
+        )
+        self.stdout.write(
+            f"latency ms: p50 {summary['p50_ms']}  p90 {summary['p90_ms']}  p99 {summary['p99_ms']}  max {summary['max_ms']}"
+        )
+        self.stdout.write(f"timeouts (> {options['timeout']}s): {summary['timeouts']}  errors: {summary['errors']}  "
+                          f"statuses: {summary['statuses']}")
+        if options["slow"]:
+            self.stdout.write(
+                f"slow downloads: {summary['slow_streaming']}/{options['slow']} still streaming at the end, "
+                f"{summary['slow_failed']} failed, {summary['slow_kb']} KB received"
+            )
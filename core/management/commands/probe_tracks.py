@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.models_media import MediaTrack
+
+
+class Command(BaseCommand):
+    help = "Read duration / bitrate / ID3 tags and build seek indexes for existing MP3 tracks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="re-probe tracks that already have a duration")
+
+    def handle(self, *args, **options):
+        qs = MediaTrack.objects.order_by("id")
+        if not options["all"]:
+            qs = qs.filter(duration__isnull=True)
+
+        probed = skipped = 0
+        for track in qs.iterator(chunk_size=50):
+            if track.probe_audio():
+                track.save(update_fields=MediaTrack.PROBE_FIELDS + ["title"])
+                probed += 1
+            else:
+                skipped += 1
+        self.stdout.write(self.style.SUCCESS(f"{probed} tracks probed, {skipped} skipped (not MP3 / unreadable)"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Post
+from core.rendering import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = "Re-render stored Post.content_html (run after changing Markdown extensions or ALLOWED_TAGS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="re-render every post, not only stale ones")
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        force = options["force"]
+        batch_size = options["batch_size"]
+
+        qs = Post.objects.only("id", "content", "content_hash", "render_version").order_by("id")
+
+        total = 0
+        updated = 0
+        batch = []
+        for post in qs.iterator(chunk_size=batch_size):
+            total += 1
+            if post.render_content(force=force):
+                batch.append(post)
+            if len(batch) >= batch_size:
+                Post.objects.bulk_update(batch, Post.RENDER_FIELDS)
+                updated += len(batch)
+                batch = []
+        if batch:
+            Post.objects.bulk_update(batch, Post.RENDER_FIELDS)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Renderer {RENDERER_VERSION}: {updated}/{total} posts re-rendered"
+        ))
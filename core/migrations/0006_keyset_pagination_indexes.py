@@ -0,0 +1,34 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:33
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    # keyset cursors need a non-null published_at on every published row
+    for name in ("Post", "MediaItem"):
+        model = apps.get_model("core", name)
+        model.objects.filter(status="published", published_at__isnull=True).update(published_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_post_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mediaitem',
+            index=models.Index(fields=['status', '-published_at', '-created_at', '-id'], name='media_status_pub_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediaitem',
+            index=models.Index(fields=['kind', 'status', '-published_at', '-created_at', '-id'], name='media_kind_pub_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-published_at', '-created_at', '-id'], name='post_status_pub_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_cover_meta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediatrack',
+            name='album',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='artist',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='is_vbr',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='seek_index',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_track_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.15 on 2026-10-18 16:51
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def _size(name):
+    if not name:
+        return 0
+    try:
+        return default_storage.size(name)
+    except OSError:
+        return 0
+
+
+def backfill_counters(apps, schema_editor):
+    # one pass over existing files; afterwards the counters are kept up to date
+    MediaItem = apps.get_model("core", "MediaItem")
+    MediaTrack = apps.get_model("core", "MediaTrack")
+    totals = {}
+    for track in list(MediaTrack.objects.only("id", "item_id", "audio_file")):
+        size = _size(track.audio_file.name)
+        MediaTrack.objects.filter(pk=track.pk).update(size=size)
+        count, total = totals.get(track.item_id, (0, 0))
+        totals[track.item_id] = (count + 1, total + size)
+    for item in list(MediaItem.objects.only("id", "file")):
+        count, total = totals.get(item.pk, (0, 0))
+        MediaItem.objects.filter(pk=item.pk).update(
+            file_size=_size(item.file.name), track_count=count, tracks_bytes=total,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_mediaitem_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaitem',
+            name='file_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mediaitem',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mediaitem',
+            name='tracks_bytes',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mediatrack',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.15 on 2026-10-18 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_media_storage_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mediaitem',
+            name='media_status_pub_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='mediaitem',
+            name='media_kind_pub_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_status_pub_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mediaitem',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at', '-created_at', '-id'], name='media_published_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediaitem',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['kind', '-published_at', '-created_at', '-id'], name='media_kind_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at', '-created_at', '-id'], name='post_published_keyset_idx'),
+        ),
+    ]
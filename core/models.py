@@ -12,9 +12,18 @@ class Post(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, allow_unicode=True)  # <-- here
     content = models.TextField(blank=True)
+    # rendered + sanitized copy of `content` (see core.rendering)
+    content_html = models.TextField(blank=True, default="")
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    render_version = models.CharField(max_length=32, blank=True, default="")
+    # list pages read these instead of the full content (see render_content)
+    excerpt = models.CharField(max_length=200, blank=True, default="")
+    reading_time = models.PositiveSmallIntegerField(default=0)  # minutes
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="draft")
 
     cover_image = models.ImageField(upload_to="covers/", blank=True, null=True)
+    # resized WebP/JPEG copies + original dimensions (see core.images)
+    cover_meta = models.JSONField(default=dict, blank=True)
     video_url = models.URLField(blank=True)
 
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -24,9 +33,55 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination on public listings (core.pagination); partial, so
+            # drafts don't take up space in it (post_detail uses the slug index)
+            models.Index(
+                fields=["-published_at", "-created_at", "-id"],
+                condition=models.Q(status="published"),
+                name="post_published_keyset_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self.slug:
+            return super().save(*args, **kwargs)
+        # no slug given: derive one from the title, "-2", "-3"... if taken
+        from .slugs import BASE_MAX_LENGTH, make_slug, save_with_slug
+        base = make_slug(self.title)[:BASE_MAX_LENGTH] or "post"
+        save_with_slug(self, base, lambda: super(Post, self).save(*args, **kwargs))
+
+    # fields written by render_content()
+    RENDER_FIELDS = ["content_html", "content_hash", "render_version", "excerpt", "reading_time"]
+
+    def html_is_stale(self):
+        from .rendering import RENDERER_VERSION, content_hash
+        return (
+            self.render_version != RENDERER_VERSION
+            or self.content_hash != content_hash(self.content)
+        )
+
+    def render_content(self, force=False):
+        """Refresh content_html if content or renderer changed. Returns True if re-rendered."""
+        from .rendering import RENDERER_VERSION, content_hash, render_markdown
+        if not force and not self.html_is_stale():
+            return False
+        self.content_html = render_markdown(self.content)
+        self.content_hash = content_hash(self.content)
+        self.render_version = RENDERER_VERSION
+        self.refresh_excerpt()
+        return True
+
+    def refresh_excerpt(self):
+        from .rendering import make_excerpt, reading_minutes
+        self.excerpt = make_excerpt(self.content_html)
+        self.reading_time = reading_minutes(self.content_html)
+
 # Media library
 from .models_media import MediaItem
+
+# Search index
+from .models_search import SearchEntry
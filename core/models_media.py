@@ -1,7 +1,23 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files import File
 from django.db import models
+from django.db.models import Max
 from django.utils.text import slugify
 from django.utils import timezone
 
+
+def _size_of(field_file):
+    if not field_file:
+        return 0
+    try:
+        return field_file.size
+    except (OSError, ValueError):
+        return 0
+
+
 class MediaItem(models.Model):
     KIND_CHOICES = [
         ("audio", "Audio (MP3)"),
@@ -25,39 +41,226 @@ class MediaItem(models.Model):
     video_url = models.URLField(blank=True)
 
     cover_image = models.ImageField(upload_to="library_covers/%Y/%m/", blank=True, null=True)
+    # resized WebP/JPEG copies + original dimensions (see core.images)
+    cover_meta = models.JSONField(default=dict, blank=True)
     description = models.TextField(blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped when tracks change (core.signals); versions the playlist manifest
+    updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(blank=True, null=True)
 
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.title)[:200] or "media"
-            slug = base
-            i = 1
-            while MediaItem.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                i += 1
-                slug = f"{base}-{i}"
-            self.slug = slug
+    # storage / track counters for the dashboard; file_size is set on save, the
+    # track fields are adjusted by core.signals as tracks come and go
+    file_size = models.PositiveBigIntegerField(default=0)
+    track_count = models.PositiveIntegerField(default=0)
+    tracks_bytes = models.PositiveBigIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # keyset pagination on /library/ and /library/<kind>/ (core.pagination),
+            # published rows only
+            models.Index(
+                fields=["-published_at", "-created_at", "-id"],
+                condition=models.Q(status="published"),
+                name="media_published_keyset_idx",
+            ),
+            models.Index(
+                fields=["kind", "-published_at", "-created_at", "-id"],
+                condition=models.Q(status="published"),
+                name="media_kind_published_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
         if self.status == "published" and not self.published_at:
             self.published_at = timezone.now()
 
-        super().save(*args, **kwargs)
+        if not kwargs.get("update_fields"):
+            self.file_size = _size_of(self.file)
+
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            from .slugs import BASE_MAX_LENGTH, save_with_slug
+            base = slugify(self.title)[:BASE_MAX_LENGTH] or "media"
+            save_with_slug(self, base, lambda: super(MediaItem, self).save(*args, **kwargs))
 
     def __str__(self):
         return self.title
+
+    @property
+    def stream_url(self):
+        from django.urls import reverse
+        return reverse("media_file", kwargs={"slug": self.slug})
+
+    @property
+    def peaks_url(self):
+        from django.urls import reverse
+        return reverse("media_peaks", kwargs={"slug": self.slug})
+
+    @property
+    def playlist_url(self):
+        from django.urls import reverse
+        return reverse("media_playlist", kwargs={"slug": self.slug})
+
+
 class MediaTrack(models.Model):
+    DEFAULT_TITLE = "Track"
+
     item = models.ForeignKey(MediaItem, related_name="tracks", on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     audio_file = models.FileField(upload_to="library_tracks/%Y/%m/")
     order = models.PositiveIntegerField(default=1)
 
+    # read from the MP3 on upload (see probe_audio / core.mp3)
+    duration = models.FloatField(null=True, blank=True)  # seconds
+    bitrate = models.PositiveIntegerField(null=True, blank=True)  # average kbps
+    sample_rate = models.PositiveIntegerField(null=True, blank=True)
+    channels = models.PositiveSmallIntegerField(null=True, blank=True)
+    is_vbr = models.BooleanField(default=False)
+    artist = models.CharField(max_length=200, blank=True)
+    album = models.CharField(max_length=200, blank=True)
+    seek_index = models.BinaryField(blank=True, default=b"", editable=False)
+    size = models.PositiveBigIntegerField(default=0)  # bytes
+
     class Meta:
         ordering = ["order", "id"]
         constraints = [
             models.UniqueConstraint(fields=["item", "order"], name="uniq_media_track_order_per_item")
         ]
 
+    # fields written by probe_audio()
+    PROBE_FIELDS = ["duration", "bitrate", "sample_rate", "channels", "is_vbr", "artist", "album", "seek_index"]
+
+    def save(self, *args, **kwargs):
+        if self.audio_file and not kwargs.get("update_fields"):
+            if self.duration is None:
+                self.probe_audio()
+            if not self.size:
+                self.size = _size_of(self.audio_file)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.item.title} - {self.order}. {self.title}"
+
+    def probe_audio(self):
+        """Fill duration / bitrate / tags / seek_index from the MP3. Returns the Mp3Info, or None."""
+        from .mp3 import parse
+        if not self.audio_file.name.lower().endswith(".mp3"):
+            return None
+        try:
+            if self.audio_file._committed:
+                with self.audio_file.open("rb") as f:
+                    info = parse(f)
+            else:
+                # fresh upload: closing it would delete the temp file before storage saves it
+                f = self.audio_file.file
+                info = parse(f)
+                f.seek(0)
+        except OSError:
+            info = None
+        if info is None:
+            return None
+
+        self.duration = round(info.duration, 3)
+        self.bitrate = info.bitrate
+        self.sample_rate = info.sample_rate
+        self.channels = info.channels
+        self.is_vbr = info.vbr
+        self.artist = info.tags.get("artist", "")[:200]
+        self.album = info.tags.get("album", "")[:200]
+        self.seek_index = info.seek_index
+        if info.tags.get("title") and self.title in ("", self.DEFAULT_TITLE):
+            self.title = info.tags["title"][:200]
+        return info
+
+    def seek_offset(self, seconds):
+        """Byte offset of the MP3 frame playing at ``seconds`` (None if not indexed)."""
+        from .mp3 import seek_offset
+        return seek_offset(self.seek_index, seconds)
+
+    @property
+    def stream_url(self):
+        from django.urls import reverse
+        return reverse("track_file", kwargs={"pk": self.pk})
+
+    @property
+    def peaks_url(self):
+        from django.urls import reverse
+        return reverse("track_peaks", kwargs={"pk": self.pk})
+
+
+class _AssembledFile(File):
+    # storage moves a file exposing temporary_file_path() instead of copying it
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class UploadSession(models.Model):
+    """A resumable, chunked upload in progress (see views_uploads).
+
+    Chunks are appended to ``part_path`` at the offset the server expects;
+    finalize verifies size/checksum and moves the assembled file into media
+    storage as MediaItem.file or a new MediaTrack.
+    """
+    TARGET_CHOICES = [
+        ("media_file", "Media item file"),
+        ("track", "New track"),
+    ]
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("complete", "Complete"),      # assembled + verified, waiting to be attached
+        ("attached", "Attached"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    item = models.ForeignKey(MediaItem, null=True, blank=True, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="uploading")
+
+    track_title = models.CharField(max_length=200, blank=True)
+    track_order = models.PositiveIntegerField(null=True, blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.id}.part")
+
+    def attach(self, item=None):
+        """Move the verified file into storage as MediaItem.file or a new MediaTrack."""
+        item = item or self.item
+        with open(self.part_path, "rb") as f:
+            content = _AssembledFile(f, name=self.filename)
+            if self.target == "track":
+                order = self.track_order
+                if order is None:
+                    order = (item.tracks.aggregate(m=Max("order"))["m"] or 0) + 1
+                result = MediaTrack(item=item, title=self.track_title or MediaTrack.DEFAULT_TITLE, order=order)
+                result.audio_file.save(self.filename, content, save=False)
+                result.save()
+            else:
+                item.file.save(self.filename, content, save=False)
+                item.save()
+                result = item
+        self.discard_part()
+        self.item = item
+        self.status = "attached"
+        self.save(update_fields=["item", "status", "updated_at"])
+        return result
+
+    def discard_part(self):
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class SearchEntry(models.Model):
+    """One row per searchable Post / MediaItem (kept in sync by core.signals).
+
+    ``title``/``body`` hold plain text with Myanmar syllables space separated
+    (core.search.segment). The full-text index itself is backend specific and
+    created in migration 0008: an FTS5 table on SQLite, a generated tsvector
+    column + GIN index on PostgreSQL.
+    """
+    KIND_CHOICES = [
+        ("post", "Post"),
+        ("media", "Media"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    status = models.CharField(max_length=20, default="draft")
+    published_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_search_entry_per_object")
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
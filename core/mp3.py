@@ -0,0 +1,365 @@
+"""Pure-Python MP3 probe: ID3 tags, stream info, duration and a seek index.
+
+``parse(f)`` walks every MPEG audio frame once (reading in large blocks, never
+the whole file) and returns an ``Mp3Info``, or None if the file isn't MPEG
+audio. Duration comes from the frame count, so it is exact for CBR and VBR
+alike; a Xing/Info or VBRI header only decides ``vbr`` and is skipped as audio.
+
+The seek index is a little-endian blob: uint32 interval in ms, then one uint32
+byte offset per interval -- the frame that is playing at ``i * interval``.
+``seek_offset(index, seconds)`` looks a time up in it.
+"""
+import struct
+from dataclasses import dataclass, field
+
+BLOCK_SIZE = 1024 * 1024
+SEEK_INTERVAL_MS = 1000
+SEEK_MAX_ENTRIES = 8192  # longer files get a coarser interval
+SYNC_SEARCH_BYTES = 256 * 1024
+
+_BITRATES = {
+    # (mpeg1?, layer) -> kbps by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG 1
+    2: (22050, 24000, 16000),  # MPEG 2
+    0: (11025, 12000, 8000),   # MPEG 2.5
+}
+_ID3_FRAMES = {
+    "TIT2": "title", "TT2": "title",
+    "TPE1": "artist", "TP1": "artist",
+    "TALB": "album", "TAL": "album",
+    "TRCK": "track", "TRK": "track",
+}
+
+
+@dataclass
+class Mp3Info:
+    duration: float = 0.0       # seconds
+    bitrate: int = 0            # average kbps
+    sample_rate: int = 0
+    channels: int = 0
+    vbr: bool = False
+    frames: int = 0
+    tags: dict = field(default_factory=dict)
+    seek_index: bytes = b""
+
+
+@dataclass
+class _Frame:
+    mpeg1: bool
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    length: int
+    samples: int
+    side_info: int
+    crc: bool
+
+
+def frame_header(b):
+    """Decode a 4-byte MPEG audio frame header; None if it isn't one."""
+    if len(b) < 4 or b[0] != 0xFF or (b[1] & 0xE0) != 0xE0:
+        return None
+    version = (b[1] >> 3) & 3
+    layer = 4 - ((b[1] >> 1) & 3)
+    br_index = b[2] >> 4
+    sr_index = (b[2] >> 2) & 3
+    if version == 1 or layer == 4 or br_index in (0, 15) or sr_index == 3:
+        return None  # reserved / free-format / bad
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][br_index]
+    sample_rate = _SAMPLE_RATES[version][sr_index]
+    padding = (b[2] >> 1) & 1
+    mono = (b[3] >> 6) == 3
+
+    if layer == 1:
+        length = (12000 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2:
+        length = 144000 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        length = (144000 if mpeg1 else 72000) * bitrate // sample_rate + padding
+        samples = 1152 if mpeg1 else 576
+    if mpeg1:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    crc = not (b[1] & 1)
+    return _Frame(mpeg1, layer, bitrate, sample_rate, 1 if mono else 2, length, samples, side_info, crc)
+
+
+class _Reader:
+    """Random access over a file object through one sliding block."""
+
+    def __init__(self, f):
+        self.f = f
+        self.start = 0
+        self.buf = b""
+        f.seek(0, 2)
+        self.size = f.tell()
+
+    def read(self, pos, n):
+        end = pos + n
+        if pos < self.start or end > self.start + len(self.buf):
+            self.f.seek(pos)
+            self.buf = self.f.read(max(n, BLOCK_SIZE))
+            self.start = pos
+        return self.buf[pos - self.start:end - self.start]
+
+
+# ===== ID3 =====
+def _syncsafe(b):
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+
+def _text(data):
+    if not data:
+        return ""
+    enc, raw = data[0], data[1:]
+    try:
+        if enc == 1:
+            value = raw.decode("utf-16")
+        elif enc == 2:
+            value = raw.decode("utf-16-be")
+        elif enc == 3:
+            value = raw.decode("utf-8")
+        else:
+            value = raw.decode("latin-1")
+    except UnicodeDecodeError:
+        value = raw.decode("latin-1", "replace")
+    # multiple values are NUL separated; keep the first
+    return value.split("\x00")[0].strip()
+
+
+def _parse_id3v2(tag, major, flags):
+    if major < 4 and flags & 0x80:
+        tag = tag.replace(b"\xff\x00", b"\xff")  # whole-tag unsynchronisation
+    pos = 0
+    if flags & 0x40 and major >= 3:
+        # extended header (its size excludes itself in v2.3)
+        pos = _syncsafe(tag[0:4]) if major >= 4 else 4 + struct.unpack(">I", tag[0:4])[0]
+
+    tags = {}
+    id_len, head_len = (3, 6) if major == 2 else (4, 10)
+    while pos + head_len <= len(tag):
+        frame_id = tag[pos:pos + id_len]
+        if not frame_id.strip(b"\x00") or not frame_id.isalnum():
+            break  # padding
+        if major == 2:
+            size = int.from_bytes(tag[pos + 3:pos + 6], "big")
+        elif major >= 4:
+            size = _syncsafe(tag[pos + 4:pos + 8])
+        else:
+            size = struct.unpack(">I", tag[pos + 4:pos + 8])[0]
+        body = tag[pos + head_len:pos + head_len + size]
+        key = _ID3_FRAMES.get(frame_id.decode("latin-1"))
+        if key and key not in tags:
+            value = _text(body)
+            if value:
+                tags[key] = value
+        pos += head_len + size
+    return tags
+
+
+def _read_id3v2(reader):
+    """Parse leading ID3v2 tag(s) -> (tags, offset of the first byte after them)."""
+    tags, pos = {}, 0
+    while True:
+        head = reader.read(pos, 10)
+        if len(head) < 10 or head[:3] != b"ID3" or head[3] == 0xFF:
+            return tags, pos
+        major, flags = head[3], head[5]
+        size = _syncsafe(head[6:10])
+        if major in (2, 3, 4):
+            for k, v in _parse_id3v2(reader.read(pos + 10, size), major, flags).items():
+                tags.setdefault(k, v)
+        pos += 10 + size + (10 if flags & 0x10 else 0)
+
+
+def _read_id3v1(reader):
+    if reader.size < 128:
+        return {}, reader.size
+    tag = reader.read(reader.size - 128, 128)
+    if tag[:3] != b"TAG":
+        return {}, reader.size
+
+    def field_(b):
+        return b.split(b"\x00")[0].decode("latin-1").strip()
+
+    tags = {"title": field_(tag[3:33]), "artist": field_(tag[33:63]), "album": field_(tag[63:93])}
+    if tag[125] == 0 and tag[126]:
+        tags["track"] = str(tag[126])
+    return {k: v for k, v in tags.items() if v}, reader.size - 128
+
+
+# ===== Frames =====
+def _find_frame(reader, pos, end, limit=SYNC_SEARCH_BYTES):
+    """First offset >= pos holding a frame header followed by another one."""
+    stop = min(end, pos + limit)
+    while pos < stop:
+        block = reader.read(pos, min(BLOCK_SIZE, stop - pos) + 4)
+        if len(block) < 4:
+            break
+        i = block.find(b"\xff")
+        while i != -1 and i < len(block) - 3:
+            candidate = pos + i
+            hdr = frame_header(block[i:i + 4])
+            if hdr:
+                nxt = candidate + hdr.length
+                if nxt + 4 > end or frame_header(reader.read(nxt, 4)):
+                    return candidate
+            i = block.find(b"\xff", i + 1)
+        pos += max(1, len(block) - 3)
+    return None
+
+
+def _vbr_header(reader, pos, hdr):
+    """'xing' / 'info' / 'vbri' if the frame at pos is an encoder info frame."""
+    xing = reader.read(pos + 4 + hdr.side_info, 4)
+    if xing == b"Xing":
+        return "xing"
+    if xing == b"Info":
+        return "info"
+    if reader.read(pos + 36, 4) == b"VBRI":
+        return "vbri"
+    return None
+
+
+def _audio_start(reader):
+    """-> (tags, first frame offset or None, end of audio, encoder info kind)."""
+    tags, audio_start = _read_id3v2(reader)
+    v1_tags, audio_end = _read_id3v1(reader)
+    for k, v in v1_tags.items():
+        tags.setdefault(k, v)
+    if audio_end >= 32 and reader.read(audio_end - 32, 8) == b"APETAGEX":
+        audio_end -= 32  # APEv2 footer; the rest of the tag fails frame checks
+
+    pos = _find_frame(reader, audio_start, audio_end)
+    kind = None
+    if pos is not None:
+        first = frame_header(reader.read(pos, 4))
+        kind = _vbr_header(reader, pos, first)
+        if kind:
+            pos += first.length
+    return tags, pos, audio_end, kind
+
+
+def _frames(reader, pos, end):
+    """Yield (offset, header) for every audio frame from pos, resyncing over junk."""
+    sample_rate = None
+    while pos + 4 <= end:
+        hdr = frame_header(reader.read(pos, 4))
+        if hdr is None or (sample_rate and hdr.sample_rate != sample_rate):
+            # junk between frames: resync, or stop at the trailing tags
+            nxt = _find_frame(reader, pos + 1, end, limit=16 * 1024)
+            if nxt is None:
+                return
+            pos = nxt
+            continue
+        sample_rate = hdr.sample_rate
+        yield pos, hdr
+        pos += hdr.length
+
+
+def parse(f):
+    """Probe an MP3 file object. Returns Mp3Info, or None if no MPEG audio is found."""
+    reader = _Reader(f)
+    tags, pos, audio_end, kind = _audio_start(reader)
+    if pos is None:
+        return None
+
+    first = None
+    offsets = []
+    frames = samples = audio_bytes = 0
+    bitrates = set()
+    for pos, hdr in _frames(reader, pos, audio_end):
+        first = first or hdr
+        start_ms = samples * 1000 / first.sample_rate
+        frame_ms = hdr.samples * 1000 / first.sample_rate
+        while len(offsets) * SEEK_INTERVAL_MS < start_ms + frame_ms:
+            offsets.append(pos)
+        frames += 1
+        samples += hdr.samples
+        audio_bytes += min(hdr.length, audio_end - pos)
+        bitrates.add(hdr.bitrate)
+
+    if not frames:
+        return None
+
+    interval = SEEK_INTERVAL_MS
+    if len(offsets) > SEEK_MAX_ENTRIES:
+        step = -(-len(offsets) // SEEK_MAX_ENTRIES)
+        offsets = offsets[::step]
+        interval *= step
+
+    duration = samples / first.sample_rate
+    return Mp3Info(
+        duration=duration,
+        bitrate=round(audio_bytes * 8 / duration / 1000) if duration else 0,
+        sample_rate=first.sample_rate,
+        channels=first.channels,
+        vbr=kind in ("xing", "vbri") or len(bitrates) > 1,
+        frames=frames,
+        tags=tags,
+        seek_index=struct.pack(f"<{len(offsets) + 1}I", interval, *offsets),
+    )
+
+
+def seek_offset(index, seconds):
+    """Byte offset of the frame playing at ``seconds`` (None without an index)."""
+    if not index or len(index) < 8:
+        return None
+    index = bytes(index)
+    interval = struct.unpack("<I", index[:4])[0]
+    count = (len(index) - 4) // 4
+    i = min(max(0, int(seconds * 1000 // interval)), count - 1)
+    return struct.unpack_from("<I", index, 4 + 4 * i)[0]
+
+
+def _global_gain(side, hdr):
+    """Largest global_gain (0-255) among the frame's granules/channels (Layer III side info)."""
+    bits = int.from_bytes(side, "big")
+    total = len(side) * 8
+    channels = hdr.channels
+    if hdr.mpeg1:
+        start = 9 + (5 if channels == 1 else 3) + 4 * channels
+        granules, gr_bits = 2, 59
+    else:
+        start = 8 + (1 if channels == 1 else 2)
+        granules, gr_bits = 1, 63
+    gain = 0
+    for i in range(granules * channels):
+        at = start + i * gr_bits + 21  # skip part2_3_length(12) + big_values(9)
+        gain = max(gain, (bits >> (total - at - 8)) & 0xFF)
+    return gain
+
+
+def global_gains(f):
+    """Per-frame loudness estimate without decoding: (gains, frame seconds) or None.
+
+    Layer III stores a per-granule ``global_gain`` quantizer step; louder
+    passages get higher gains (amplitude ~ 2 ** (gain / 4)). Good enough for a
+    waveform overview when no decoder is available.
+    """
+    reader = _Reader(f)
+    _, pos, audio_end, _ = _audio_start(reader)
+    if pos is None:
+        return None
+    gains = []
+    frame_seconds = 0.0
+    for pos, hdr in _frames(reader, pos, audio_end):
+        if hdr.layer != 3:
+            return None
+        frame_seconds = hdr.samples / hdr.sample_rate
+        side = reader.read(pos + 4 + (2 if hdr.crc else 0), hdr.side_info)
+        gains.append(_global_gain(side, hdr))
+    return (gains, frame_seconds) if gains else None
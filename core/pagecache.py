@@ -0,0 +1,167 @@
+"""Full-page cache for anonymous GETs of public pages, purged by tag.
+
+Pages are stored in the ``pages`` cache alias (settings.PAGE_CACHE_BACKEND:
+locmem, file, or redis -- any Redis-compatible server), keyed by deploy
+version (core.deploy) + path + sorted query string. Each page records the tags
+it depends on ("posts", "media", "media:<id>") and the version of each tag
+when it was stored; core.signals bumps a tag's version when a Post / MediaItem
+/ MediaTrack is saved or deleted, so exactly the pages that used it miss on
+their next hit. No timeout games.
+
+Views opt in with ``@page_cache(tags=...)`` and can add tags known only while
+rendering (e.g. the item id) with ``add_tags(request, ...)``.
+
+locmem is per worker: a purge only reaches the worker that handled the save,
+so use file or redis when running more than one worker.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from . import deploy
+
+ALIAS = "pages"
+_TAG_PREFIX = "pctag:"
+_PAGE_PREFIX = "pcpage:"
+_KEPT_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+def _cache():
+    return caches[ALIAS]
+
+
+def enabled():
+    return getattr(settings, "PAGE_CACHE_ENABLED", False)
+
+
+def page_key(request):
+    query = sorted(request.GET.lists())
+    # pages cached by the previous deploy's templates miss after a deploy
+    raw = f"{deploy.version()}|{request.path}?{query!r}"
+    return _PAGE_PREFIX + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def add_tags(request, *tags):
+    tags_ = getattr(request, "page_cache_tags", None)
+    if tags_ is not None:
+        tags_.update(tags)
+
+
+def purge(*tags):
+    """Invalidate every cached page depending on any of ``tags``."""
+    if not enabled() or not tags:
+        return
+    # a fresh unique value rather than incr(): a tag evicted from the cache then
+    # reads as "missing", which also counts as a miss
+    def bump():
+        version = time.time_ns()
+        _cache().set_many({_TAG_PREFIX + t: version for t in tags}, timeout=None)
+    # after commit, so a hit between purge and commit can't re-cache old data
+    transaction.on_commit(bump)
+
+
+def _cacheable(request):
+    return request.method in ("GET", "HEAD") and not request.user.is_authenticated
+
+
+def _lookup(request):
+    entry = _cache().get(page_key(request))
+    if entry is None:
+        return None
+    keys = [_TAG_PREFIX + t for t in entry["tags"]]
+    current = _cache().get_many(keys)
+    for t, version in entry["tags"].items():
+        if current.get(_TAG_PREFIX + t) != version:
+            return None
+    response = HttpResponse(entry["content"], status=entry["status"], content_type=entry["content_type"])
+    for header, value in entry.get("headers", {}).items():
+        response[header] = value
+    # validators set by core.conditional: answer revalidations straight from the cache
+    return get_conditional_response(
+        request,
+        etag=response.get("ETag"),
+        last_modified=parse_http_date_safe(response.get("Last-Modified", "")),
+        response=response,
+    )
+
+
+def _cached(request):
+    """-> (cacheable, cached response or None), in one trip to the sync thread."""
+    if not _cacheable(request):
+        return False, None
+    return True, _lookup(request)
+
+
+def _store(request, response, tags):
+    cache = _cache()
+    keys = [_TAG_PREFIX + t for t in tags]
+    versions = cache.get_many(keys)
+    missing = {k: time.time_ns() for k in keys if k not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    cache.set(page_key(request), {
+        "tags": {t: versions[_TAG_PREFIX + t] for t in tags},
+        "content": response.content,
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "headers": {h: response[h] for h in _KEPT_HEADERS if response.has_header(h)},
+    }, timeout=getattr(settings, "PAGE_CACHE_SECONDS", 86400))
+
+
+def _storable(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def page_cache(tags=()):
+    """Serve anonymous GETs of the decorated view from the page cache."""
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            # cache reads / writes may hit the disk or Redis: keep them off the event loop
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if not enabled():
+                    return await view(request, *args, **kwargs)
+                cacheable, response = await sync_to_async(_cached)(request)
+                if not cacheable:
+                    return await view(request, *args, **kwargs)
+
+                if response is not None:
+                    response["X-Page-Cache"] = "hit"
+                else:
+                    request.page_cache_tags = set(tags)
+                    response = await view(request, *args, **kwargs)
+                    if _storable(response):
+                        await sync_to_async(_store)(request, response, request.page_cache_tags)
+                        response["X-Page-Cache"] = "miss"
+                patch_vary_headers(response, ("Cookie",))
+                return response
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if not enabled() or not _cacheable(request):
+                    return view(request, *args, **kwargs)
+
+                response = _lookup(request)
+                if response is not None:
+                    response["X-Page-Cache"] = "hit"
+                else:
+                    request.page_cache_tags = set(tags)
+                    response = view(request, *args, **kwargs)
+                    if _storable(response):
+                        _store(request, response, request.page_cache_tags)
+                        response["X-Page-Cache"] = "miss"
+                # same URL renders differently once logged in
+                patch_vary_headers(response, ("Cookie",))
+                return response
+        return wrapper
+    return decorator
@@ -0,0 +1,137 @@
+"""Keyset (cursor) pagination for the public listings.
+
+Pages are addressed by the sort key of the row at the page edge instead of an
+OFFSET, so every page costs the same index range scan no matter how deep the
+archive goes, and rows published while someone is paging don't shift pages.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# newest first; id breaks ties so the order is total
+KEYSET_FIELDS = ("published_at", "created_at", "id")
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = ""
+    prev_cursor: str = ""
+
+    @property
+    def has_next(self):
+        return bool(self.next_cursor)
+
+    @property
+    def has_prev(self):
+        return bool(self.prev_cursor)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(obj, fields=KEYSET_FIELDS) -> str:
+    values = []
+    for name in fields:
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fields=KEYSET_FIELDS):
+    """Cursor -> list of values, or None when missing/garbled (treated as first page)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError, RecursionError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+
+    decoded = []
+    for name, value in zip(fields, values):
+        if name.endswith("_at"):
+            try:
+                value = parse_datetime(value) if isinstance(value, str) else None
+            except ValueError:  # well-formed but impossible, e.g. month 13
+                return None
+            if value is None or timezone.is_naive(value):
+                return None
+        # ids: anything outside a 64-bit column would overflow the query parameter
+        elif isinstance(value, bool) or not isinstance(value, int) or not 0 <= value < 2 ** 63:
+            return None
+        decoded.append(value)
+    return decoded
+
+
+def _keyset_q(fields, values, op):
+    """(a op A) OR (a = A AND b op B) OR (a = A AND b = B AND c op C) ..."""
+    q = Q()
+    for i, name in enumerate(fields):
+        cond = Q(**{f"{name}__{op}": values[i]})
+        for prev_name, prev_value in zip(fields[:i], values[:i]):
+            cond &= Q(**{prev_name: prev_value})
+        q |= cond
+    # redundant bound on the leading field: lets the planner seek into the
+    # index instead of scanning it from the newest row (the OR alone can't)
+    return Q(**{f"{fields[0]}__{op}e": values[0]}) & q
+
+
+def _page_query(qs, after, before, page_size, fields):
+    """-> (one page of ``qs`` plus a look-ahead row, backwards, continued)."""
+    after_values = decode_cursor(after, fields)
+    before_values = decode_cursor(before, fields) if after_values is None else None
+    if before_values is not None:
+        return qs.filter(_keyset_q(fields, before_values, "gt")).order_by(*fields)[:page_size + 1], True, True
+    if after_values is not None:
+        qs = qs.filter(_keyset_q(fields, after_values, "lt"))
+    return qs.order_by(*[f"-{name}" for name in fields])[:page_size + 1], False, after_values is not None
+
+
+def _make_page(rows, page_size, backwards, continued, fields):
+    if backwards:
+        has_more_newer = len(rows) > page_size
+        items = list(reversed(rows[:page_size]))
+        has_more_older = True
+    else:
+        items = rows[:page_size]
+        has_more_older = len(rows) > page_size
+        has_more_newer = continued
+
+    page = KeysetPage(items=items)
+    if items:
+        if has_more_older:
+            page.next_cursor = encode_cursor(items[-1], fields)
+        if has_more_newer:
+            page.prev_cursor = encode_cursor(items[0], fields)
+    return page
+
+
+def paginate_keyset(qs, after="", before="", page_size=None, fields=KEYSET_FIELDS):
+    """Return one KeysetPage of ``qs`` ordered by ``fields`` descending.
+
+    ``after`` continues towards older rows, ``before`` goes back towards newer
+    rows; with neither the newest page is returned. Rows must have non-null
+    values for every field (published rows always get ``published_at``).
+    """
+    page_size = page_size or getattr(settings, "LIST_PAGE_SIZE", 12)
+    query, backwards, continued = _page_query(qs, after, before, page_size, fields)
+    return _make_page(list(query), page_size, backwards, continued, fields)
+
+
+async def apaginate_keyset(qs, after="", before="", page_size=None, fields=KEYSET_FIELDS):
+    """``paginate_keyset`` for async views."""
+    page_size = page_size or getattr(settings, "LIST_PAGE_SIZE", 12)
+    query, backwards, continued = _page_query(qs, after, before, page_size, fields)
+    return _make_page([row async for row in query], page_size, backwards, continued, fields)
@@ -0,0 +1,87 @@
+"""Playlist manifest for a MediaItem: one JSON document with everything the
+player needs (tracks, stream / peaks URLs, durations, sizes, cover variants).
+
+Built from a single tracks query and kept in a per-worker LRU keyed by the
+item's ``updated_at``. Adding, editing or deleting a track bumps that
+timestamp (core.signals), so every worker sees a new key -- and clients a new
+ETag -- without any cross-process invalidation.
+"""
+import json
+
+from django.conf import settings
+from django.utils.http import quote_etag
+
+from .rendering import LRUCache
+
+# bump when the manifest's shape changes
+MANIFEST_VERSION = 1
+
+_cache = LRUCache(getattr(settings, "PLAYLIST_CACHE_SIZE", 256))
+
+
+def manifest_etag(item):
+    stamp = item.updated_at.timestamp() if item.updated_at else 0
+    return quote_etag(f"pl{MANIFEST_VERSION}-{item.pk}-{stamp:.6f}")
+
+
+def _file_size(field_file):
+    try:
+        return field_file.size
+    except (OSError, ValueError):
+        return None
+
+
+def _cover(item):
+    meta = item.cover_meta or {}
+    if not item.cover_image:
+        return None
+    storage = item.cover_image.storage
+    return {
+        "url": item.cover_image.url,
+        "width": meta.get("width"),
+        "height": meta.get("height"),
+        "variants": [
+            {"w": v["w"], "h": v["h"], "webp": storage.url(v["webp"]), "jpeg": storage.url(v["jpeg"])}
+            for v in meta.get("variants", [])
+        ],
+    }
+
+
+def build_manifest(item):
+    tracks = list(item.tracks.defer("seek_index"))
+    entries = [
+        {
+            "id": t.pk,
+            "order": t.order,
+            "title": t.title,
+            "artist": t.artist,
+            "album": t.album,
+            "url": t.stream_url,
+            "peaks_url": t.peaks_url,
+            "duration": t.duration,
+            "bitrate": t.bitrate,
+            "size": t.size or _file_size(t.audio_file),
+        }
+        for t in tracks
+    ]
+    durations = [t["duration"] for t in entries]
+    return {
+        "id": item.pk,
+        "slug": item.slug,
+        "title": item.title,
+        "kind": item.kind,
+        "cover": _cover(item),
+        "duration": sum(durations) if durations and None not in durations else None,
+        "tracks": entries,
+    }
+
+
+def get_manifest(item):
+    """-> (etag, manifest dict, json text) for ``item``, built at most once per version."""
+    etag = manifest_etag(item)
+    cached = _cache.get(etag)
+    if cached is None:
+        data = build_manifest(item)
+        cached = (etag, data, json.dumps(data, ensure_ascii=False))
+        _cache.set(etag, cached)
+    return cached
@@ -0,0 +1,309 @@
+import hashlib
+import html as html_lib
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import bleach
+import markdown as md
+from django.conf import settings
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+MARKDOWN_EXTENSIONS = [
+    "fenced_code", "tables", "nl2br",
+    "codehilite",
+    "admonition",
+    "attr_list",
+    "md_in_html",
+    "pymdownx.tasklist",
+]
+MARKDOWN_EXTENSION_CONFIGS = {
+    "codehilite": {"guess_lang": False, "css_class": "codehilite"},
+    "pymdownx.tasklist": {"custom_checkbox": True, "clickable_checkbox": False},
+}
+
+ALLOWED_TAGS = bleach.sanitizer.ALLOWED_TAGS.union({
+    "p", "div", "span", "pre", "code",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+    "ul", "ol", "li",
+    "blockquote",
+    "br", "hr",
+    "table", "thead", "tbody", "tr", "th", "td",
+    "a",
+    "input",
+})
+ALLOWED_ATTRS = {
+    **bleach.sanitizer.ALLOWED_ATTRIBUTES,
+    "a": ["href", "title", "rel", "target"],
+    "div": ["class"],
+    "span": ["class"],
+    "p": ["class"],
+    "ul": ["class"],
+    "ol": ["class"],
+    "li": ["class"],
+    "pre": ["class"],
+    "code": ["class"],
+    "input": ["type", "checked", "disabled", "class"],
+    "h1": ["id"], "h2": ["id"], "h3": ["id"], "h4": ["id"], "h5": ["id"], "h6": ["id"],
+    "th": ["colspan", "rowspan"],
+    "td": ["colspan", "rowspan"],
+}
+ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+
+
+def _renderer_version() -> str:
+    """Fingerprint of everything that affects the rendered HTML.
+
+    Changing the extension list, their configs or the bleach allow-lists
+    changes this value, which marks every stored ``Post.content_html`` stale.
+    """
+    parts = [
+        md.__version__,
+        bleach.__version__,
+        repr(MARKDOWN_EXTENSIONS),
+        repr(sorted((k, sorted(v.items())) for k, v in MARKDOWN_EXTENSION_CONFIGS.items())),
+        repr(sorted(ALLOWED_TAGS)),
+        repr(sorted((k, sorted(v)) for k, v in ALLOWED_ATTRS.items())),
+        repr(ALLOWED_PROTOCOLS),
+    ]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+RENDERER_VERSION = _renderer_version()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+EXCERPT_LENGTH = 150
+EXCERPT_MAX_CHARS = 200  # Post.excerpt max_length
+WORDS_PER_MINUTE = 200
+
+
+def plain_text(html: str) -> str:
+    """Rendered HTML -> whitespace-collapsed plain text"""
+    return " ".join(html_lib.unescape(strip_tags(html or "")).split())
+
+
+_CODE_BLOCK_RE = re.compile(r"<pre\b.*?</pre>", re.S | re.I)
+
+
+def make_excerpt(html: str, length=EXCERPT_LENGTH) -> str:
+    # code listings make unreadable cards; inline <code> stays part of the sentence
+    text = Truncator(plain_text(_CODE_BLOCK_RE.sub(" ", html or ""))).chars(length)
+    if len(text) > EXCERPT_MAX_CHARS:
+        # Truncator doesn't count combining marks (most Burmese vowel signs), the column does
+        text = text[:EXCERPT_MAX_CHARS - 1].rstrip() + "…"
+    return text
+
+
+def reading_minutes(html: str) -> int:
+    text = plain_text(html)
+    # Burmese isn't space separated, so also estimate words from length
+    # (~6 chars per word incl. spacing for English) and take the larger.
+    words = max(len(text.split()), len(text) // 6)
+    return max(1, math.ceil(words / WORDS_PER_MINUTE)) if text else 0
+
+
+class LRUCache:
+    """Small thread-safe LRU (gunicorn workers are single process, maybe threaded)"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_html_cache = LRUCache(getattr(settings, "MARKDOWN_CACHE_SIZE", 256))
+_block_cache = LRUCache(getattr(settings, "MARKDOWN_BLOCK_CACHE_SIZE", 4096))
+_local = threading.local()
+
+
+def _engine():
+    """Per-thread Markdown + Cleaner, built once (extension setup is the slow part)"""
+    engine = getattr(_local, "engine", None)
+    if engine is None:
+        from .highlight import install
+        install()
+        converter = md.Markdown(
+            extensions=MARKDOWN_EXTENSIONS,
+            extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        )
+        cleaner = bleach.Cleaner(
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRS,
+            protocols=ALLOWED_PROTOCOLS,
+            strip=True,
+        )
+        engine = _local.engine = (converter, cleaner)
+    return engine
+
+
+def _render_uncached(text: str) -> str:
+    from .timing import track
+    converter, cleaner = _engine()
+    with track("markdown"):
+        try:
+            html = converter.convert(text)
+        finally:
+            converter.reset()
+        return cleaner.clean(html)
+
+
+def render_markdown(text: str) -> str:
+    """Markdown -> sanitized HTML (same pipeline for post pages and preview)"""
+    text = text or ""
+    key = content_hash(text)
+    html = _html_cache.get(key)
+    if html is None:
+        html = _render_uncached(text)
+        _html_cache.set(key, html)
+    return html
+
+
+# ===== Block-level (incremental) rendering for the panel preview =====
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_HTML_OPEN_RE = re.compile(r"^ {0,3}<([a-zA-Z][a-zA-Z0-9-]*)(\s[^>]*)?>")
+_REFDEF_RE = re.compile(r"^ {0,3}\[[^\]]+\]:\s*\S")
+_LIST_RE = re.compile(r"^ {0,3}([*+-]|\d+[.)])\s")
+_QUOTE_RE = re.compile(r"^ {0,3}>")
+_VOID_TAGS = {"br", "hr", "img", "input", "meta", "link", "source", "wbr"}
+
+
+def split_blocks(text: str):
+    """Split Markdown into top-level blocks that render the same on their own.
+
+    Returns a list of block strings, or None when the document has constructs
+    that reach across blocks (unclosed fences, md_in_html spanning blank lines,
+    reference-style link definitions, a quote continued after a block that
+    only ends with one) and must be rendered as a whole.
+    """
+    blocks = []
+    current = []
+    fence = None
+    html_tag = None
+    html_depth = 0
+    html_markdown = False
+
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        if fence:
+            current.append(line)
+            stripped = line.strip()
+            if stripped.startswith(fence) and set(stripped) == {fence[0]}:
+                fence = None
+            continue
+
+        if html_tag:
+            if not line.strip() and html_depth > 0:
+                if html_markdown:
+                    return None
+                current.append(line)
+                continue
+            current.append(line)
+            html_depth += len(re.findall(rf"<{html_tag}\b", line)) - len(re.findall(rf"</{html_tag}\s*>", line))
+            if html_depth <= 0:
+                html_tag = None
+            continue
+
+        if _REFDEF_RE.match(line):
+            return None
+
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = []
+            continue
+
+        if not current and blocks:
+            # indented continuation (admonition body, list paragraph) or the
+            # next item of a loose list belongs to the previous block
+            if line[:1] in (" ", "\t") or (_LIST_RE.match(line) and _LIST_RE.match(blocks[-1][0])):
+                current = blocks.pop()
+                current.append("")
+            elif _QUOTE_RE.match(line):
+                # "> a\n\n> b" is one blockquote; the same goes for a quote
+                # ending a block that doesn't start with one, so render it whole
+                if _QUOTE_RE.match(blocks[-1][0]):
+                    current = blocks.pop()
+                    current.append("")
+                elif any(_QUOTE_RE.match(prev) for prev in blocks[-1]):
+                    return None
+
+        m = _FENCE_RE.match(line)
+        if m:
+            fence = m.group(1)
+            current.append(line)
+            continue
+
+        m = _HTML_OPEN_RE.match(line)
+        if m and not current and m.group(1).lower() not in _VOID_TAGS:
+            tag = m.group(1)
+            depth = len(re.findall(rf"<{tag}\b", line)) - len(re.findall(rf"</{tag}\s*>", line))
+            if depth > 0:
+                html_tag, html_depth = tag, depth
+                html_markdown = "markdown" in (m.group(2) or "")
+
+        current.append(line)
+
+    if fence or html_tag:
+        return None
+    if current:
+        blocks.append(current)
+    return ["\n".join(b) for b in blocks]
+
+
+def render_block(block: str) -> str:
+    key = content_hash(block)
+    html = _block_cache.get(key)
+    if html is None:
+        html = _render_uncached(block)
+        _block_cache.set(key, html)
+    return html
+
+
+def render_blocks(text: str, known=()):
+    """Incremental render: only blocks whose hash the client lacks are rendered.
+
+    Returns ``{"mode": "blocks", "blocks": [hash, ...], "changed": [{"index", "html"}]}``
+    or ``{"mode": "full", "html": ...}`` when the document can't be split safely.
+    """
+    blocks = split_blocks(text)
+    if blocks is None:
+        return {"mode": "full", "html": render_markdown(text)}
+
+    known = set(known)
+    hashes = []
+    changed = []
+    for i, block in enumerate(blocks):
+        h = content_hash(block)[:16]
+        hashes.append(h)
+        if h not in known:
+            changed.append({"index": i, "html": render_block(block)})
+    return {"mode": "blocks", "blocks": hashes, "changed": changed}
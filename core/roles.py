@@ -0,0 +1,37 @@
+"""Panel role lookups (Superadmin / Editor / Staff).
+
+Roles are group names. ``group_names(user)`` reads them from
+``prefetch_related("groups")`` data when the queryset provided it, otherwise
+runs one query and keeps the result on the user instance, so templates can ask
+for a role any number of times per user. ``request_roles(request)`` does the
+same for the logged-in user, memoized on the request.
+"""
+EDITOR = "Editor"
+
+
+def group_names(user):
+    if not user.is_authenticated:
+        return frozenset()
+    prefetched = getattr(user, "_prefetched_objects_cache", {})
+    if "groups" in prefetched:
+        return frozenset(g.name for g in prefetched["groups"])
+    names = getattr(user, "_group_names", None)
+    if names is None:
+        names = frozenset(user.groups.values_list("name", flat=True))
+        user._group_names = names
+    return names
+
+
+def has_role(user, name):
+    return name in group_names(user)
+
+
+def is_editor(user):
+    return has_role(user, EDITOR)
+
+
+def request_roles(request):
+    """Group names of ``request.user``, looked up once per request."""
+    if not hasattr(request, "_roles"):
+        request._roles = group_names(request.user)
+    return request._roles
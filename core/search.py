@@ -0,0 +1,212 @@
+"""Full-text search over posts and media.
+
+Entries live in ``SearchEntry`` (core.models_search) and are refreshed by the
+post_save / post_delete handlers in core.signals. Matching and ranking run in
+the database: FTS5 + bm25() on SQLite, tsvector + ts_rank() on PostgreSQL,
+plain LIKE on anything else (or SQLite without FTS5).
+
+Burmese is written without spaces between words, so both indexed text and
+queries go through ``segment()``, which puts a space between Myanmar
+syllables. A multi-syllable query term then becomes a phrase query, which
+finds the word wherever it occurs inside a run of text.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection
+from django.utils.html import strip_tags
+
+from .models_search import SearchEntry
+from .rendering import plain_text
+
+# Myanmar blocks (basic + extended-A)
+_MYANMAR_RUN_RE = re.compile(r"[က-႟ꩠ-ꩿ]+")
+# syllable starts: a consonant not stacked (preceded by virama) and not
+# killed (followed by asat/virama), or an independent vowel/digit/punctuation
+_SYLLABLE_START_RE = re.compile(
+    r"((?<!္)[က-အ](?![်္])|[ဣ-ဧဩဪဿ၌-၏၀-၉၊။])"
+)
+
+BODY_MAX_CHARS = 100_000
+# deepest results page served; also keeps OFFSET inside a 64-bit integer
+MAX_PAGE = 100
+
+
+def segment(text: str) -> str:
+    """Insert spaces between Myanmar syllables; other scripts are left alone."""
+    def split_run(m):
+        return " " + _SYLLABLE_START_RE.sub(r" \1", m.group(0)).strip() + " "
+    return " ".join(_MYANMAR_RUN_RE.sub(split_run, text or "").split())
+
+
+def query_terms(q: str):
+    """User query -> list of terms; each term is a list of tokens (a phrase)."""
+    terms = []
+    for word in (q or "").split():
+        tokens = [t for t in segment(word).split() if any(c.isalnum() for c in t)]
+        if tokens:
+            terms.append(tokens)
+    return terms[:10]
+
+
+# ===== Index maintenance =====
+def _post_fields(post):
+    body = plain_text(post.content_html) if post.content_html else strip_tags(post.content or "")
+    return {
+        "title": segment(post.title),
+        "body": segment(body[:BODY_MAX_CHARS]),
+        "status": post.status,
+        "published_at": post.published_at,
+    }
+
+
+def _media_fields(item):
+    return {
+        "title": segment(item.title),
+        "body": segment((item.description or "")[:BODY_MAX_CHARS]),
+        "status": item.status,
+        "published_at": item.published_at,
+    }
+
+
+def index_post(post):
+    SearchEntry.objects.update_or_create(kind="post", object_id=post.pk, defaults=_post_fields(post))
+
+
+def index_media(item):
+    SearchEntry.objects.update_or_create(kind="media", object_id=item.pk, defaults=_media_fields(item))
+
+
+def unindex(kind, object_id):
+    SearchEntry.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index():
+    from .models import Post
+    from .models_media import MediaItem
+
+    SearchEntry.objects.all().delete()
+    entries = [SearchEntry(kind="post", object_id=p.pk, **_post_fields(p)) for p in Post.objects.iterator()]
+    entries += [SearchEntry(kind="media", object_id=m.pk, **_media_fields(m)) for m in MediaItem.objects.iterator()]
+    SearchEntry.objects.bulk_create(entries, batch_size=500)
+    return len(entries)
+
+
+# ===== Querying =====
+@dataclass
+class SearchPage:
+    hits: list = field(default_factory=list)  # [(kind, object_id), ...] best first
+    page: int = 1
+    has_next: bool = False
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+
+_fts5_available = None
+
+
+def _has_fts5():
+    global _fts5_available
+    if _fts5_available is None:
+        with connection.cursor() as cursor:
+            _fts5_available = "core_searchentry_fts" in connection.introspection.table_names(cursor)
+    return _fts5_available
+
+
+def _filters(kinds, published_only, alias):
+    sql = []
+    params = []
+    if kinds:
+        sql.append(f"{alias}.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params += list(kinds)
+    if published_only:
+        sql.append(f"{alias}.status = %s")
+        params.append("published")
+    return sql, params
+
+
+def _search_sqlite(terms, kinds, published_only, limit, offset):
+    # every term must match; each term is a quoted FTS5 phrase
+    match = " AND ".join('"' + " ".join(tokens).replace('"', '""') + '"' for tokens in terms)
+    where, params = _filters(kinds, published_only, "e")
+    where_sql = "".join(f" AND {w}" for w in where)
+    sql = (
+        "SELECT e.kind, e.object_id FROM core_searchentry_fts f "
+        "JOIN core_searchentry e ON e.id = f.rowid "
+        f"WHERE core_searchentry_fts MATCH %s{where_sql} "
+        # bm25: lower is better; title matches weigh 10x body matches
+        "ORDER BY bm25(core_searchentry_fts, 10.0, 1.0), e.published_at DESC "
+        "LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *params, limit, offset])
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def _search_postgres(terms, kinds, published_only, limit, offset):
+    tsquery = " && ".join(["phraseto_tsquery('simple', %s)"] * len(terms))
+    where, params = _filters(kinds, published_only, "e")
+    where_sql = "".join(f" AND {w}" for w in where)
+    sql = (
+        f"SELECT e.kind, e.object_id FROM core_searchentry e, (SELECT {tsquery} AS query) q "
+        f"WHERE e.search_vector @@ q.query{where_sql} "
+        "ORDER BY ts_rank(e.search_vector, q.query) DESC, e.published_at DESC NULLS LAST "
+        "LIMIT %s OFFSET %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*(" ".join(t) for t in terms), *params, limit, offset])
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def _search_like(terms, kinds, published_only, limit, offset):
+    from django.db.models import Q
+
+    qs = SearchEntry.objects.all()
+    if kinds:
+        qs = qs.filter(kind__in=kinds)
+    if published_only:
+        qs = qs.filter(status="published")
+    for tokens in terms:
+        phrase = " ".join(tokens)
+        qs = qs.filter(Q(title__icontains=phrase) | Q(body__icontains=phrase))
+    qs = qs.order_by("-published_at", "-id").values_list("kind", "object_id")
+    return list(qs[offset:offset + limit])
+
+
+def search(q, kinds=("post", "media"), published_only=True, page=1, page_size=None):
+    """Ranked search. Returns a SearchPage of (kind, object_id) hits."""
+    page_size = page_size or getattr(settings, "LIST_PAGE_SIZE", 12)
+    page = min(max(1, page), MAX_PAGE)
+    terms = query_terms(q)
+    if not terms:
+        return SearchPage(page=page)
+
+    if connection.vendor == "sqlite" and _has_fts5():
+        backend = _search_sqlite
+    elif connection.vendor == "postgresql":
+        backend = _search_postgres
+    else:
+        backend = _search_like
+
+    rows = backend(terms, list(kinds), published_only, page_size + 1, (page - 1) * page_size)
+    return SearchPage(hits=rows[:page_size], page=page, has_next=len(rows) > page_size)
+
+
+def load_hits(hits):
+    """(kind, id) hits -> model instances in rank order (one query per kind)."""
+    from .models import Post
+    from .models_media import MediaItem
+
+    post_ids = [pk for kind, pk in hits if kind == "post"]
+    media_ids = [pk for kind, pk in hits if kind == "media"]
+    objects = {}
+    if post_ids:
+        for p in Post.objects.filter(pk__in=post_ids).defer("content", "content_html"):
+            objects[("post", p.pk)] = p
+    if media_ids:
+        for m in MediaItem.objects.filter(pk__in=media_ids):
+            objects[("media", m.pk)] = m
+    return [(kind, objects[(kind, pk)]) for kind, pk in hits if (kind, pk) in objects]
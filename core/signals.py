@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_save
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import images, pagecache, search, stats, waveform
+from .models import Post
+from .models_media import MediaItem, MediaTrack
+
+
+def _refresh_cover(sender, instance, force=False):
+    # write only cover_meta so this doesn't re-trigger post_save
+    if not images.refresh_cover(instance, force=force):
+        return False
+    sender.objects.filter(pk=instance.pk).update(cover_meta=instance.cover_meta, updated_at=timezone.now())
+    return True
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_cover(sender, instance)
+        search.index_post(instance)
+        pagecache.purge("posts", f"post:{instance.pk}")
+        stats.invalidate()
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.unindex("post", instance.pk)
+    images.delete_derivatives(instance.cover_meta, instance.cover_image.storage)
+    pagecache.purge("posts", f"post:{instance.pk}")
+    stats.invalidate()
+
+
+@receiver(post_save, sender=MediaItem)
+def media_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _refresh_cover(sender, instance)
+        search.index_media(instance)
+        if instance.kind == "audio":
+            waveform.schedule(instance.file)
+        pagecache.purge("media", f"media:{instance.pk}")
+        stats.invalidate()
+
+
+@receiver(post_delete, sender=MediaItem)
+def media_deleted(sender, instance, **kwargs):
+    search.unindex("media", instance.pk)
+    images.delete_derivatives(instance.cover_meta, instance.cover_image.storage)
+    waveform.delete_peaks(instance.file)
+    pagecache.purge("media", f"media:{instance.pk}")
+    stats.invalidate()
+
+
+def _touch_item(item_id, **counters):
+    # new playlist manifest version (core.playlist) + drop the cached item page;
+    # counters adjust the item's track/storage totals in the same UPDATE
+    MediaItem.objects.filter(pk=item_id).update(updated_at=timezone.now(), **counters)
+    pagecache.purge(f"media:{item_id}")
+    if counters:
+        stats.invalidate()
+
+
+@receiver(post_save, sender=MediaTrack)
+def track_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        if created:
+            _touch_item(instance.item_id, track_count=F("track_count") + 1, tracks_bytes=F("tracks_bytes") + instance.size)
+        else:
+            _touch_item(instance.item_id)
+        waveform.schedule(instance.audio_file)
+
+
+@receiver(post_delete, sender=MediaTrack)
+def track_deleted(sender, instance, **kwargs):
+    _touch_item(instance.item_id, track_count=F("track_count") - 1, tracks_bytes=F("tracks_bytes") - instance.size)
+    waveform.delete_peaks(instance.audio_file)
+
+
+# bulk_create / update() skip the signals above; core.tracks calls these instead
+def tracks_added(item_id, tracks):
+    _touch_item(
+        item_id,
+        track_count=F("track_count") + len(tracks),
+        tracks_bytes=F("tracks_bytes") + sum(t.size for t in tracks),
+    )
+    for track in tracks:
+        waveform.schedule(track.audio_file)
+
+
+def tracks_reordered(item_id):
+    _touch_item(item_id)
+
+
+def rebuild_cover(sender, instance, force=False):
+    """build_cover_images: refresh an existing cover; the pages showing it re-render."""
+    if not _refresh_cover(sender, instance, force=force):
+        return False
+    if sender is Post:
+        pagecache.purge("posts", f"post:{instance.pk}")
+    else:
+        pagecache.purge("media", f"media:{instance.pk}")
+    return True
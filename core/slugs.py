@@ -0,0 +1,56 @@
+"""Unique slugs for posts and media items: "lesson", "lesson-2", "lesson-3", ...
+
+``next_free_slug`` reads every slug that could collide with ``base`` (``base``
+itself and ``base-<n>``) in one query and picks the lowest free suffix in
+memory, instead of probing suffixes one query at a time. ``save_with_slug``
+saves in a savepoint and, when a concurrent save took the same slug first
+(IntegrityError on the unique index), picks again.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+# callers cut the base to this so "-<n>" still fits the 220-char slug fields
+BASE_MAX_LENGTH = 200
+
+
+def make_slug(raw: str) -> str:
+    raw = (raw or "").strip()
+    # allow unicode, replace spaces with hyphen, remove weird chars
+    s = slugify(raw, allow_unicode=True)
+    return s or raw.replace(" ", "-")
+
+
+def next_free_slug(qs, base):
+    """``base`` if unused in ``qs``, else ``base-<n>`` with the lowest free n >= 2."""
+    taken = set(
+        qs.filter(Q(slug=base) | Q(slug__startswith=f"{base}-")).values_list("slug", flat=True)
+    )
+    if base not in taken:
+        return base
+    suffix = re.compile(rf"{re.escape(base)}-(\d+)")
+    used = {int(m.group(1)) for m in map(suffix.fullmatch, taken) if m}
+    n = 2
+    while n in used:
+        n += 1
+    return f"{base}-{n}"
+
+
+def save_with_slug(instance, base, save):
+    """Give ``instance`` a free slug derived from ``base`` and ``save()`` it."""
+    others = type(instance)._default_manager.all()
+    if instance.pk is not None:
+        others = others.exclude(pk=instance.pk)
+    for attempt in range(MAX_ATTEMPTS):
+        instance.slug = next_free_slug(others, base)
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            # someone else saved this slug since we looked; anything else is a real error
+            if attempt == MAX_ATTEMPTS - 1 or not others.filter(slug=instance.slug).exists():
+                raise
@@ -0,0 +1,63 @@
+"""Panel dashboard numbers.
+
+One conditional-aggregate query per model, kept for DASHBOARD_STATS_SECONDS in
+the ``pages`` cache alias and dropped by core.signals whenever a post, media
+item or track changes. That alias is shared by all workers (file or redis
+backend), so a drop made by the worker handling the save reaches the others;
+the default cache is locmem, i.e. per worker.
+
+Storage and track totals come from the per-item counters on MediaItem
+(file_size / track_count / tracks_bytes), which the signals keep current, so
+nothing is re-counted or stat()ed here.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+CACHE_KEY = "panel:dashboard_stats"
+CACHE_ALIAS = "pages"
+
+
+def _compute():
+    from .models import Post
+    from .models_media import MediaItem
+
+    posts = Post.objects.aggregate(
+        total=Count("id"),
+        published=Count("id", filter=Q(status="published")),
+        drafts=Count("id", filter=Q(status="draft")),
+    )
+    media = MediaItem.objects.aggregate(
+        total=Count("id"),
+        published=Count("id", filter=Q(status="published")),
+        audio=Count("id", filter=Q(kind="audio")),
+        video=Count("id", filter=Q(kind="video")),
+        tracks=Sum("track_count"),
+        file_bytes=Sum("file_size"),
+        track_bytes=Sum("tracks_bytes"),
+    )
+    return {
+        "total_posts": posts["total"],
+        "published_posts": posts["published"],
+        "draft_posts": posts["drafts"],
+        "total_media": media["total"],
+        "published_media": media["published"],
+        "audio_media": media["audio"],
+        "video_media": media["video"],
+        "total_tracks": media["tracks"] or 0,
+        "storage_bytes": (media["file_bytes"] or 0) + (media["track_bytes"] or 0),
+    }
+
+
+def dashboard_stats():
+    cache = caches[CACHE_ALIAS]
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = _compute()
+        cache.set(CACHE_KEY, stats, getattr(settings, "DASHBOARD_STATS_SECONDS", 60))
+    return stats
+
+
+def invalidate():
+    transaction.on_commit(lambda: caches[CACHE_ALIAS].delete(CACHE_KEY))
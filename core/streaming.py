@@ -0,0 +1,167 @@
+"""Byte-range file responses for audio/video.
+
+Browsers seek in <audio>/<video> with ``Range: bytes=N-`` requests; without
+206 support every seek restarts the download from byte 0. Files are read in
+fixed-size chunks, never loaded whole. Behind nginx (MEDIA_X_ACCEL_PREFIX set)
+the response is handed off with X-Accel-Redirect so nginx does the sending.
+
+Under ASGI (uvicorn workers) the body is an async generator whose reads run in
+a thread: a slow client then costs an idle coroutine rather than a worker
+thread, and Django doesn't buffer the whole file, which it does to turn a sync
+iterator into an async one.
+"""
+import asyncio
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(size, mtime):
+    return quote_etag(f"{int(mtime):x}-{size:x}")
+
+
+def parse_range(header, size):
+    """Single ``bytes=`` range -> (start, end) inclusive, None for no/ignored
+    range, or "unsatisfiable". Multi-range requests are served whole."""
+    m = _RANGE_RE.match((header or "").strip())
+    if not m:
+        return None
+    first, last = m.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        # syntactically invalid (RFC 7233 2.1): ignore the header
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def iter_file(path, start, length, chunk_size=CHUNK_SIZE):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+async def aiter_file(path, start, length, chunk_size=CHUNK_SIZE):
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(f.seek, start)
+        remaining = length
+        while remaining > 0:
+            data = await asyncio.to_thread(f.read, min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def _if_range_matches(request, etag, mtime):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(mtime) <= since
+
+
+def _not_modified(request, etag, mtime):
+    inm = request.META.get("HTTP_IF_NONE_MATCH")
+    if inm:
+        return etag in [t.strip() for t in inm.split(",")] or inm.strip() == "*"
+    ims = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return ims is not None and int(mtime) <= ims
+
+
+def serve_file(request, field_file, content_type=None, public=True):
+    """Serve a FileField's file with Range / If-Range / conditional GET support.
+
+    ``public=False`` (a draft previewed by staff) keeps the file out of shared caches.
+    """
+    path = field_file.path
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("File not found")
+    size, mtime = stat.st_size, stat.st_mtime
+    etag = file_etag(size, mtime)
+    content_type = content_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(mtime),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400" if public else "private, no-store",
+    }
+
+    if _not_modified(request, etag, mtime):
+        response = HttpResponse(status=304)
+        for k, v in headers.items():
+            response[k] = v
+        return response
+
+    accel_prefix = getattr(settings, "MEDIA_X_ACCEL_PREFIX", "")
+    if accel_prefix:
+        # nginx handles Range itself for the internal location; it decodes the
+        # percent-encoding, whereas a raw non-ASCII name would be MIME-encoded
+        # by Django and point nowhere
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + quote(field_file.name.lstrip("/"))
+        for k, v in headers.items():
+            response[k] = v
+        return response
+
+    byte_range = None
+    if _if_range_matches(request, etag, mtime):
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    if byte_range is None:
+        start, end, status = 0, size - 1, 200
+    else:
+        (start, end), status = byte_range, 206
+    length = end - start + 1 if size else 0
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type, status=status)
+    else:
+        chunks = (aiter_file if isinstance(request, ASGIRequest) else iter_file)(path, start, length)
+        response = StreamingHttpResponse(chunks, content_type=content_type, status=status)
+    response["Content-Length"] = str(length)
+    if status == 206:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    for k, v in headers.items():
+        response[k] = v
+    return response
@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _srcset(storage, variants, key):
+    return ", ".join(f"{storage.url(v[key])} {v['w']}w" for v in variants)
+
+
+@register.simple_tag
+def cover_img(obj, css_class="", alt="", sizes="100vw", lazy=True):
+    """Responsive <picture> for obj.cover_image using obj.cover_meta (core.images).
+
+    Falls back to a plain <img> when no derivatives exist yet.
+    """
+    image = obj.cover_image
+    if not image:
+        return ""
+    loading = "lazy" if lazy else "eager"
+    meta = getattr(obj, "cover_meta", None) or {}
+    variants = meta.get("variants")
+    if not variants:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            image.url, alt, css_class, loading,
+        )
+
+    storage = image.storage
+    # default src: the smallest copy at least 720px wide (or the largest there is)
+    default = next((v for v in variants if v["w"] >= 720), variants[-1])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" class="{}" '
+        'loading="{}" decoding="async"></picture>',
+        _srcset(storage, variants, "webp"), sizes,
+        storage.url(default["jpeg"]), _srcset(storage, variants, "jpeg"), sizes,
+        meta["width"], meta["height"], alt, css_class, loading,
+    )
@@ -1,13 +1,15 @@
 from django import template
 
+from core import roles
+
 register = template.Library()
 
 @register.filter
 def is_in_group(user, group_name):
-    """Check if user is in a specific group"""
-    return user.groups.filter(name=group_name).exists()
+    """Check if user is in a specific group (uses prefetched groups when present)"""
+    return roles.has_role(user, group_name)
 
 @register.filter
 def has_editor_role(user):
     """Check if user has Editor role"""
-    return user.groups.filter(name="Editor").exists()
+    return roles.is_editor(user)
@@ -1,3 +1,1026 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import shutil
+import struct
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
+from urllib.parse import unquote
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.text import Truncator
+from PIL import ExifTags, Image
+
+from core import deploy, highlight, mp3, pagecache, playlist, rendering, roles, search, slugs, stats, timing
+from core.models import Post
+from core.models_media import MediaItem, MediaTrack, UploadSession
+from core.pagination import KEYSET_FIELDS, _keyset_q, decode_cursor, encode_cursor, paginate_keyset
+from core.rendering import RENDERER_VERSION, plain_text, render_block, render_markdown, split_blocks
+from core.streaming import parse_range
+
+# Tests never touch the page_cache directory: the page cache is off (purges
+# wait for on_commit, which TestCase never fires) and the pages alias, which
+# core.stats shares, is a private locmem cache.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "pages": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-pages"},
+}
+no_page_cache = override_settings(PAGE_CACHE_ENABLED=False, CACHES=TEST_CACHES)
+
+
+def use_temp_dirs(test, *setting_names):
+    """Point each directory setting (MEDIA_ROOT, ...) at a fresh temp dir for ``test``."""
+    dirs = {}
+    for name in setting_names:
+        dirs[name] = tempfile.mkdtemp()
+        test.addCleanup(shutil.rmtree, dirs[name], ignore_errors=True)
+    settings = override_settings(**dirs)
+    settings.enable()
+    test.addCleanup(settings.disable)
+    return dirs
+
+
+@no_page_cache
+class RoleQueryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.editors = Group.objects.create(name=roles.EDITOR)
+        self.client.force_login(self.admin)
+
+    def add_staff(self, count):
+        for i in range(count):
+            user = User.objects.create_user(f"staff{User.objects.count()}", password="pw", is_staff=True)
+            if i % 2:
+                user.groups.add(self.editors)
+
+    def user_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/panel/users/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_user_list_query_count_is_constant(self):
+        self.add_staff(3)
+        few, _ = self.user_list_queries()
+        self.add_staff(12)
+        many, response = self.user_list_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, "staff1<")
+        self.assertEqual(response.content.decode().count(">\n                Editor\n"), 7)
+
+    def test_roles_are_looked_up_once_per_user(self):
+        user = User.objects.create_user("ed", password="pw", is_staff=True)
+        user.groups.add(self.editors)
+        user = User.objects.get(pk=user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(roles.is_editor(user))
+            self.assertTrue(roles.has_role(user, roles.EDITOR))
+            self.assertFalse(roles.has_role(user, "Other"))
+
+
+class BlockPreviewTests(SimpleTestCase):
+    """The block-by-block preview must match the full render of the post."""
+
+    DOCUMENTS = [
+        "# Title\n\npara one\n\npara two",
+        "- a\n\n- b\n\n  continued\n\nafter",
+        "```python\nx = 1\n\ny = 2\n```\n\ntext",
+        "> a\n\n> b",
+        "> a\n> b\n\n> c\n\nafter",
+        "para\n\n> quote\n\n> more\n\ntext",
+        "para\n> lazy quote\n\n> more",
+        "- item\n  > nested\n\n> top",
+    ]
+
+    def test_blocks_match_full_render(self):
+        for doc in self.DOCUMENTS:
+            blocks = split_blocks(doc)
+            if blocks is None:
+                continue  # the preview renders the whole document
+            with self.subTest(doc=doc):
+                self.assertHTMLEqual("\n".join(render_block(b) for b in blocks), render_markdown(doc))
+
+    def test_consecutive_quotes_are_one_block(self):
+        self.assertEqual(split_blocks("> a\n\n> b\n\ntext"), ["> a\n\n> b", "text"])
+        self.assertIsNone(split_blocks("para\n> lazy quote\n\n> more"))
+
+
+@no_page_cache
+class QueryPlanTests(TestCase):
+    """The public listings and detail lookups must be served by an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Post.objects.bulk_create([
+            Post(
+                title=f"Post {i}", slug=f"post-{i}", status="published" if i % 4 else "draft",
+                published_at=now - timedelta(hours=i) if i % 4 else None,
+            )
+            for i in range(200)
+        ])
+        MediaItem.objects.bulk_create([
+            MediaItem(
+                title=f"Item {i}", slug=f"item-{i}", kind="audio" if i % 2 else "video",
+                status="published" if i % 3 else "draft",
+                published_at=now - timedelta(hours=i) if i % 3 else None,
+            )
+            for i in range(100)
+        ])
+        cls.cursor = list(Post.objects.filter(status="published").order_by("-published_at")
+                          .values_list(*KEYSET_FIELDS)[20])
+
+    def plan(self, qs):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # tiny tables: make the planner show whether an index *can* be used
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return qs.explain()
+
+    def assertUsesIndex(self, qs, name):
+        plan = self.plan(qs)
+        self.assertIn(name, plan, plan)
+
+    def test_home_and_posts_list(self):
+        published = Post.objects.filter(status="published")
+        desc = [f"-{f}" for f in KEYSET_FIELDS]
+        self.assertUsesIndex(published.order_by("-published_at", "-created_at")[:6], "post_published_keyset_idx")
+        self.assertUsesIndex(published.order_by(*desc)[:13], "post_published_keyset_idx")
+        # a later page seeks into the index rather than scanning from the top
+        older = published.filter(_keyset_q(KEYSET_FIELDS, self.cursor, "lt")).order_by(*desc)[:13]
+        self.assertUsesIndex(older, "post_published_keyset_idx")
+        if connection.vendor == "sqlite":
+            self.assertIn("SEARCH", self.plan(older))
+
+    def test_post_detail(self):
+        plan = self.plan(Post.objects.filter(status="published", slug="post-5"))
+        self.assertIn("slug", plan.lower(), plan)
+        self.assertNotIn("SCAN core_post", plan)
+
+    def test_media_list(self):
+        desc = [f"-{f}" for f in KEYSET_FIELDS]
+        published = MediaItem.objects.filter(status="published")
+        self.assertUsesIndex(published.order_by(*desc)[:13], "media_published_keyset_idx")
+        self.assertUsesIndex(published.filter(kind="audio").order_by(*desc)[:13], "media_kind_published_idx")
+
+
+@no_page_cache
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.match = Post.objects.create(title="Django tips", content="Keyset pagination", status="published", published_at=now)
+        Post.objects.create(title="Cooking", content="Rice and curry", status="published", published_at=now)
+        Post.objects.create(title="Django draft", content="Not yet", status="draft")
+
+    def test_search(self):
+        page = search.search("django tips")
+        self.assertEqual(page.hits, [("post", self.match.pk)])
+
+    def test_page_is_clamped(self):
+        self.assertEqual(search.search("django", page=10 ** 30).page, search.MAX_PAGE)
+        for page in ("9" * 40, "²", "-1", "abc"):
+            with self.subTest(page=page):
+                response = self.client.get("/search/", {"q": "django", "page": page})
+                self.assertEqual(response.status_code, 200)
+
+    @skipUnless(connection.vendor == "postgresql", "PostgreSQL full-text search")
+    def test_postgres_query(self):
+        terms = search.query_terms("django pagination")
+        rows = search._search_postgres(terms, ["post", "media"], True, 10, 0)
+        self.assertEqual(rows, [("post", self.match.pk)])
+
+
+@no_page_cache
+class PageCacheTests(TestCase):
+    def setUp(self):
+        pagecache._cache().clear()
+        self.addCleanup(deploy.version.cache_clear)
+
+    def get_home(self, version):
+        deploy.version.cache_clear()
+        with override_settings(PAGE_CACHE_ENABLED=True, DEPLOY_VERSION=version):
+            return self.client.get("/")
+
+    def test_new_deploy_version_misses(self):
+        self.assertEqual(self.get_home("v1")["X-Page-Cache"], "miss")
+        self.assertEqual(self.get_home("v1")["X-Page-Cache"], "hit")
+        self.assertEqual(self.get_home("v2")["X-Page-Cache"], "miss")
+
+
+@no_page_cache
+class ConditionalTests(TestCase):
+    def setUp(self):
+        self.addCleanup(deploy.version.cache_clear)
+        Post.objects.create(title="Hello", content="Hi", status="published", published_at=timezone.now())
+
+    def get_home(self, version, **headers):
+        deploy.version.cache_clear()
+        with override_settings(DEPLOY_VERSION=version):
+            return self.client.get("/", **headers)
+
+    def test_deploy_changes_the_etag(self):
+        etag = self.get_home("v1")["ETag"]
+        self.assertEqual(self.get_home("v1", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.get_home("v2", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@no_page_cache
+class DashboardStatsTests(TestCase):
+    def test_stats_live_in_the_shared_cache(self):
+        caches[stats.CACHE_ALIAS].delete(stats.CACHE_KEY)
+        self.assertEqual(stats.dashboard_stats()["total_posts"], 0)
+        self.assertIsNotNone(caches[stats.CACHE_ALIAS].get(stats.CACHE_KEY))
+        self.assertIsNone(cache.get(stats.CACHE_KEY))
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title="Hello", content="Hi")
+        self.assertIsNone(caches[stats.CACHE_ALIAS].get(stats.CACHE_KEY))
+
+
+@no_page_cache
+class CoverImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def jpeg_with_gps(self, orientation=1):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        exif[ExifTags.Base.GPSInfo] = {ExifTags.GPS.GPSLatitudeRef: "N", ExifTags.GPS.GPSLatitude: (16.0, 48.0, 0.0)}
+        buf = io.BytesIO()
+        Image.new("RGB", (800, 400), (200, 30, 30)).save(buf, "JPEG", exif=exif, comment=b"camera")
+        return ContentFile(buf.getvalue(), name="cover.jpg")
+
+    def stored_original(self, post):
+        with post.cover_image.storage.open(post.cover_image.name, "rb") as f:
+            img = Image.open(f)
+            img.load()
+        return img
+
+    def test_original_is_stripped(self):
+        post = Post.objects.create(title="Cover", content="x", cover_image=self.jpeg_with_gps())
+        img = self.stored_original(post)
+        self.assertEqual(dict(img.getexif()), {})
+        self.assertNotIn("comment", img.info)
+        self.assertEqual(img.size, (800, 400))
+        self.assertTrue(post.cover_meta["variants"])
+
+    def test_rebuild_command_refreshes_cached_pages(self):
+        item = MediaItem.objects.create(
+            title="Talk", kind="video", status="published", video_url="https://example.com/v", cover_image=self.jpeg_with_gps(),
+        )
+        item.refresh_from_db()
+        url = f"/library/item/{item.slug}/"
+        pagecache._cache().clear()
+        with override_settings(PAGE_CACHE_ENABLED=True):
+            first = self.client.get(url)
+            self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("build_cover_images", "--force", stdout=io.StringIO())
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertGreater(MediaItem.objects.get(pk=item.pk).updated_at, item.updated_at)
+
+    def test_rotated_original_is_turned_upright(self):
+        post = Post.objects.create(title="Cover", content="x", cover_image=self.jpeg_with_gps(orientation=6))
+        img = self.stored_original(post)
+        self.assertEqual(dict(img.getexif()), {})
+        self.assertEqual(img.size, (400, 800))
+        self.assertEqual((post.cover_meta["width"], post.cover_meta["height"]), (400, 800))
+
+
+@no_page_cache
+class StreamingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.item = MediaItem.objects.create(title="Talk", kind="audio", status="published", published_at=timezone.now())
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=100-", 100), "unsatisfiable")
+        # last byte before the first one: invalid, so the whole file is sent
+        self.assertIsNone(parse_range("bytes=5-2", 100))
+
+    def test_backwards_range_gets_whole_file(self):
+        self.item.file.save("clip.mp3", ContentFile(b"0123456789"))
+        response = self.client.get(f"/library/item/{self.item.slug}/file/", HTTP_RANGE="bytes=5-2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+    def test_drafts_stay_out_of_shared_caches(self):
+        self.item.file.save("clip.mp3", ContentFile(b"0123456789"))
+        url = f"/library/item/{self.item.slug}/file/"
+        self.assertEqual(self.client.get(url)["Cache-Control"], "public, max-age=86400")
+        MediaItem.objects.filter(pk=self.item.pk).update(status="draft")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        response = self.client.get(url, HTTP_RANGE="bytes=0-3")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Cache-Control"], "private, no-store")
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual((not_modified.status_code, not_modified["Cache-Control"]), (304, "private, no-store"))
+
+    def test_x_accel_redirect_with_non_ascii_name(self):
+        self.item.file.save("ဟောပြောချက်.mp3", ContentFile(b"0123456789"))
+        self.assertFalse(self.item.file.name.isascii())
+        with override_settings(MEDIA_X_ACCEL_PREFIX="/protected-media"):
+            response = self.client.get(f"/library/item/{self.item.slug}/file/")
+        header = response["X-Accel-Redirect"]
+        self.assertTrue(header.isascii())
+        self.assertNotIn("=?utf-8?", header)
+        self.assertEqual(unquote(header), "/protected-media/" + self.item.file.name)
+
+
+@no_page_cache
+class AsyncViewTests(TestCase):
+    """The public views under ASGI (AsyncClient) and WSGI (Client)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("reader", password="pw")
+        now = timezone.now()
+        cls.post = Post.objects.create(title="Hello", content="# Hi", status="published", published_at=now)
+        cls.item = MediaItem.objects.create(title="Talk", kind="video", status="published", published_at=now)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    async def test_public_pages(self):
+        for url in ("/", "/library/", f"/library/item/{self.item.slug}/"):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn("public", response["Cache-Control"])
+            not_modified = await self.async_client.get(url, headers={"if-none-match": response["ETag"]})
+            self.assertEqual(not_modified.status_code, 304, url)
+        self.assertEqual((await self.async_client.get("/library/item/missing/")).status_code, 404)
+
+    async def test_posts_need_login(self):
+        response = await self.async_client.get("/posts/")
+        self.assertRedirects(response, "/login/?next=/posts/", fetch_redirect_response=False)
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get("/posts/")
+        self.assertContains(response, "Hello")
+        response = await self.async_client.get(f"/posts/{self.post.slug}/")
+        self.assertContains(response, '<h1 class="post-title">Hello</h1>')
+
+    async def test_file_streams_asynchronously_under_asgi(self):
+        await sync_to_async(self.item.file.save)("clip.mp4", ContentFile(b"0123456789" * 1000))
+        url = f"/library/item/{self.item.slug}/file/"
+
+        response = await self.async_client.get(url, headers={"range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b"".join([chunk async for chunk in response]), b"0123456789")
+
+        # the WSGI path keeps the plain iterator
+        response = await sync_to_async(self.client.get)(url, HTTP_RANGE="bytes=10-19")
+        self.assertFalse(response.is_async)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+
+@no_page_cache
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.dirs = use_temp_dirs(self, "MEDIA_ROOT", "CHUNKED_UPLOAD_DIR")
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        self.item = MediaItem.objects.create(title="Course", kind="audio")
+        self.data = b"0123456789" * 10
+
+    def init(self, **data):
+        data = {"target": "media_file", "item": self.item.pk, "filename": "talk.mp4", "size": len(self.data), **data}
+        return self.client.post("/panel/uploads/", data, content_type="application/json")
+
+    def put(self, upload_id, offset, chunk, **headers):
+        return self.client.put(
+            f"/panel/uploads/{upload_id}/", chunk, content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset), **headers,
+        )
+
+    def finalize(self, upload_id):
+        return self.client.post(f"/panel/uploads/{upload_id}/finalize/")
+
+    def upload(self, **data):
+        upload_id = self.init(**data).json()["id"]
+        self.assertEqual(self.put(upload_id, 0, self.data[:60]).json()["offset"], 60)
+        self.assertEqual(self.put(upload_id, 60, self.data[60:]).json()["offset"], len(self.data))
+        return upload_id
+
+    def test_init_rejects_oversize_and_disallowed_type(self):
+        with override_settings(MEDIA_UPLOAD_MAX_BYTES=50):
+            self.assertEqual(self.init().status_code, 413)
+        response = self.init(filename="setup.exe")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not allowed", response.json()["error"])
+        self.assertEqual(self.init(target="track", filename="talk.mp4").status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_offset_mismatch_returns_server_offset(self):
+        upload_id = self.init().json()["id"]
+        self.assertEqual(self.put(upload_id, 0, self.data[:40]).status_code, 200)
+        # the client retries a chunk that already landed
+        response = self.put(upload_id, 0, self.data[:40])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 40)
+        self.assertEqual(self.client.get(f"/panel/uploads/{upload_id}/").json()["offset"], 40)
+
+    def test_bad_chunk_checksum(self):
+        upload_id = self.init().json()["id"]
+        self.put(upload_id, 0, self.data[:40])
+        response = self.put(upload_id, 40, self.data[40:80], HTTP_UPLOAD_CHECKSUM="sha256 " + "0" * 64)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["offset"], 40)
+        self.assertEqual(os.path.getsize(UploadSession.objects.get().part_path), 40)
+        good = "sha256 " + hashlib.sha256(self.data[40:80]).hexdigest()
+        self.assertEqual(self.put(upload_id, 40, self.data[40:80], HTTP_UPLOAD_CHECKSUM=good).json()["offset"], 80)
+
+    def test_finalize_incomplete_upload(self):
+        upload_id = self.init().json()["id"]
+        self.put(upload_id, 0, self.data[:40])
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 40)
+        self.assertEqual(UploadSession.objects.get().status, "uploading")
+
+    def test_finalize_sha256_mismatch_discards_upload(self):
+        upload_id = self.upload(sha256=hashlib.sha256(b"something else").hexdigest())
+        part_path = UploadSession.objects.get().part_path
+        self.assertEqual(self.finalize(upload_id).status_code, 422)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(part_path))
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.file)
+
+    def test_attach_media_file(self):
+        upload_id = self.upload(sha256=hashlib.sha256(self.data).hexdigest())
+        response = self.finalize(upload_id)
+        self.assertEqual(response.json()["status"], "attached")
+        self.item.refresh_from_db()
+        self.assertEqual(response.json()["url"], self.item.stream_url)
+        with self.item.file.open("rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(self.item.file_size, len(self.data))
+        session = UploadSession.objects.get()
+        self.assertEqual(session.status, "attached")
+        self.assertFalse(os.path.exists(session.part_path))
+
+    def test_attach_track_appends_after_the_last_order(self):
+        MediaTrack.objects.create(item=self.item, title="Intro", order=3, audio_file=ContentFile(b"x", name="intro.mp3"))
+        upload_id = self.upload(target="track", filename="part2.mp3", title="Part 2")
+        part_path = UploadSession.objects.get().part_path
+        response = self.finalize(upload_id)
+        track = MediaTrack.objects.get(pk=response.json()["track"])
+        self.assertEqual((track.title, track.order, track.size), ("Part 2", 4, len(self.data)))
+        self.assertFalse(os.path.exists(part_path))
+        self.assertEqual(UploadSession.objects.get().status, "attached")
+        # finalize again: nothing left to attach, no second track
+        self.assertEqual(self.finalize(upload_id).json()["status"], "attached")
+        self.assertEqual(self.item.tracks.count(), 2)
+
+
+def mp3_frame(kbps=128, tag=b""):
+    """One silent MPEG-1 Layer III stereo frame at 48 kHz (24 ms), optionally an encoder info frame."""
+    header = bytes([0xFF, 0xFB, {128: 0x90, 64: 0x50}[kbps] | 0x04, 0x00])
+    length = 144000 * kbps // 48000
+    body = bytes(32) + tag  # side info, then the Xing/Info tag if any
+    return header + body + bytes(length - 4 - len(body))
+
+
+def id3v2(**frames):
+    body = b""
+    for frame_id, text in frames.items():
+        data = b"\x01" + text.encode("utf-16")
+        body += frame_id.encode() + struct.pack(">I", len(data)) + b"\x00\x00" + data
+    size = len(body)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x03\x00\x00" + syncsafe + body
+
+
+def id3v1(title="", artist="", album="", track=0):
+    def field(value, n):
+        return value.encode("latin-1").ljust(n, b"\x00")
+    return (b"TAG" + field(title, 30) + field(artist, 30) + field(album, 30) + b"2024"
+            + bytes(28) + b"\x00" + bytes([track]) + b"\xff")
+
+
+class Mp3ParserTests(SimpleTestCase):
+    def test_cbr(self):
+        tag = id3v2(TIT2="ဓမ္မ", TPE1="Speaker")
+        info = mp3.parse(io.BytesIO(tag + mp3_frame() * 125 + id3v1(album="Talks", track=7)))
+        self.assertEqual(info.frames, 125)
+        self.assertAlmostEqual(info.duration, 3.0)
+        self.assertEqual((info.bitrate, info.sample_rate, info.channels, info.vbr), (128, 48000, 2, False))
+        self.assertEqual(info.tags, {"title": "ဓမ္မ", "artist": "Speaker", "album": "Talks", "track": "7"})
+
+    def test_xing_vbr(self):
+        frames = (mp3_frame(128) + mp3_frame(64)) * 100
+        info = mp3.parse(io.BytesIO(mp3_frame(tag=b"Xing") + frames))
+        self.assertEqual(info.frames, 200)  # the info frame is not audio
+        self.assertAlmostEqual(info.duration, 4.8)
+        self.assertEqual(info.bitrate, 96)
+        self.assertTrue(info.vbr)
+
+    def test_encoder_info_frame_decides_vbr(self):
+        frames = mp3_frame() * 50
+        self.assertTrue(mp3.parse(io.BytesIO(mp3_frame(tag=b"Xing") + frames)).vbr)
+        info = mp3.parse(io.BytesIO(mp3_frame(tag=b"Info") + frames))
+        self.assertFalse(info.vbr)
+        self.assertEqual(info.frames, 50)
+
+    def test_resync_after_garbage(self):
+        junk = b"\x00garbage\xff\x00" * 40
+        info = mp3.parse(io.BytesIO(mp3_frame() * 60 + junk + mp3_frame() * 65))
+        self.assertEqual(info.frames, 125)
+        self.assertAlmostEqual(info.duration, 3.0)
+
+    def test_seek_offset_lands_on_a_frame(self):
+        tag = id3v2(TIT2="Title")
+        frame = mp3_frame()
+        info = mp3.parse(io.BytesIO(tag + frame * 125))
+        # 24 ms frames: the one playing at 1 s is frame 41 (984-1008 ms)
+        self.assertEqual(mp3.seek_offset(info.seek_index, 1.0), len(tag) + 41 * len(frame))
+        self.assertEqual(mp3.seek_offset(info.seek_index, 0), len(tag))
+        for seconds in (0.5, 2.25, 99):
+            offset = mp3.seek_offset(info.seek_index, seconds)
+            self.assertEqual((offset - len(tag)) % len(frame), 0)
+        self.assertIsNone(mp3.seek_offset(b"", 1.0))
+
+    def test_not_mp3(self):
+        for data in (b"", b"not an mp3 file" * 100, b"\x89PNG\r\n\x1a\n" + bytes(1000), id3v2(TIT2="Only a tag")):
+            with self.subTest(data=data[:16]):
+                self.assertIsNone(mp3.parse(io.BytesIO(data)))
+
+
+@no_page_cache
+class TrackProbeTests(TestCase):
+    def setUp(self):
+        use_temp_dirs(self, "MEDIA_ROOT")
+        self.item = MediaItem.objects.create(title="Course", kind="audio")
+
+    def test_probe_on_save(self):
+        tag = id3v2(TIT2="Lesson one", TALB="Course")
+        track = MediaTrack.objects.create(
+            item=self.item, title=MediaTrack.DEFAULT_TITLE, audio_file=ContentFile(tag + mp3_frame() * 125, name="one.mp3"),
+        )
+        track.refresh_from_db()
+        self.assertEqual((track.title, track.album, track.duration, track.bitrate), ("Lesson one", "Course", 3.0, 128))
+        self.assertEqual(track.seek_offset(1.0), len(tag) + 41 * len(mp3_frame()))
+
+    def test_not_probed(self):
+        track = MediaTrack.objects.create(item=self.item, title="Noise", audio_file=ContentFile(b"x" * 500, name="noise.mp3"))
+        self.assertIsNone(track.duration)
+        self.assertIsNone(track.seek_offset(1.0))
+        wav = MediaTrack(item=self.item, title="Wave", order=2, audio_file=ContentFile(mp3_frame() * 10, name="a.wav"))
+        self.assertIsNone(wav.probe_audio())
+
+
+@no_page_cache
+class SlugTests(TestCase):
+    def create(self, title="Lesson"):
+        return MediaItem.objects.create(title=title, kind="audio").slug
+
+    def test_suffixes(self):
+        self.assertEqual([self.create() for _ in range(3)], ["lesson", "lesson-2", "lesson-3"])
+        self.assertEqual(self.create("Lesson intro"), "lesson-intro")
+        MediaItem.objects.filter(slug="lesson-2").delete()
+        self.assertEqual(self.create(), "lesson-2")  # fills the gap
+        self.assertEqual(self.create(), "lesson-4")  # "lesson-intro" is not a suffix
+        self.assertEqual(self.create("Lesson intro"), "lesson-intro-2")
+
+    def test_one_query_per_pick(self):
+        for _ in range(5):
+            self.create()
+        with self.assertNumQueries(1):
+            self.assertEqual(slugs.next_free_slug(MediaItem.objects.all(), "lesson"), "lesson-6")
+
+    def test_retries_when_a_concurrent_save_took_the_slug(self):
+        self.create()
+        stale = iter(["lesson"])  # what a save racing the first one would have picked
+        real = slugs.next_free_slug
+        with mock.patch("core.slugs.next_free_slug", side_effect=lambda qs, base: next(stale, None) or real(qs, base)) as pick:
+            self.assertEqual(self.create(), "lesson-2")
+        self.assertEqual(pick.call_count, 2)
+
+    def test_other_integrity_errors_are_raised(self):
+        def save():
+            raise IntegrityError("NOT NULL constraint failed")
+        with self.assertRaises(IntegrityError):
+            slugs.save_with_slug(MediaItem(title="Lesson"), "lesson", save)
+
+    def test_post_create_suffixes_a_duplicate_title(self):
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        Post.objects.create(title="Lesson", content="x")
+        response = self.client.post("/panel/posts/new/", {"title": "Lesson", "content": "y", "status": "draft"})
+        self.assertRedirects(response, "/panel/posts/", fetch_redirect_response=False)
+        self.assertEqual(Post.objects.get(content="y").slug, "lesson-2")
+        # an explicit slug that is taken is still an error
+        response = self.client.post("/panel/posts/new/", {"title": "Other", "slug": "lesson", "content": "z"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(content="z").exists())
+
+
+@no_page_cache
+class UploadHandlerTests(TestCase):
+    """Multipart uploads stream through core.uploads.HashingTemporaryFileUploadHandler."""
+
+    def setUp(self):
+        use_temp_dirs(self, "MEDIA_ROOT")
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+
+    def post_media(self, name, data):
+        return self.client.post("/panel/media/new/", {
+            "title": "Talk", "kind": "audio", "status": "draft", "file": SimpleUploadedFile(name, data),
+        })
+
+    def test_upload_is_hashed(self):
+        data = mp3_frame() * 2000  # several handler chunks
+        with self.assertLogs("core.uploads", "INFO") as logs:
+            response = self.post_media("talk.mp3", data)
+        self.assertIn(f"bytes={len(data)}", logs.output[0])
+        self.assertRedirects(response, "/panel/media/", fetch_redirect_response=False)
+        uploaded = response.wsgi_request.FILES["file"]
+        self.assertEqual(uploaded.sha256, hashlib.sha256(data).hexdigest())
+        self.assertEqual(uploaded.upload_stats["bytes"], len(data))
+        item = MediaItem.objects.get()
+        with item.file.open("rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def assertRejected(self, response, message):
+        self.assertContains(response, message)
+        self.assertNotIn("file", response.wsgi_request.FILES)
+        self.assertFalse(MediaItem.objects.exists())
+
+    def test_disallowed_extension(self):
+        self.assertRejected(self.post_media("talk.exe", mp3_frame() * 10), "file type .exe is not allowed here")
+
+    def test_oversize_stream_is_cut_off(self):
+        with override_settings(MEDIA_UPLOAD_MAX_BYTES=1024 * 1024):
+            response = self.post_media("talk.mp3", bytes(2 * 1024 * 1024))
+        self.assertRejected(response, "larger than the 1 MB upload limit")
+
+    def test_bad_signature(self):
+        self.assertRejected(self.post_media("talk.mp3", b"MZ\x90\x00" + bytes(4096)), "look like a media file")
+        self.assertRejected(self.post_media("talk.mp3", b"  <?php echo 1; ?>"), "look like a media file")
+
+
+@no_page_cache
+class TrackBulkTests(TestCase):
+    def setUp(self):
+        use_temp_dirs(self, "MEDIA_ROOT")
+        self.client.force_login(User.objects.create_user("staff", password="pw", is_staff=True))
+        self.item = MediaItem.objects.create(title="Course", kind="audio")
+        self.intro = self.add_track("Intro", 1)
+
+    def add_track(self, title, order, item=None):
+        return MediaTrack.objects.create(
+            item=item or self.item, title=title, order=order, audio_file=ContentFile(b"x" * 100, name="t.mp3"),
+        )
+
+    def reorder(self, order):
+        return self.client.post(
+            f"/panel/media/{self.item.pk}/tracks/reorder/", {"order": order}, content_type="application/json",
+        )
+
+    def test_bulk_upload_order_and_counters(self):
+        files = [
+            SimpleUploadedFile("10 - Outro.mp3", b"o" * 300),
+            SimpleUploadedFile("02_Lesson_two.mp3", b"l" * 200),
+            SimpleUploadedFile("zzz.mp3", id3v2(TIT2="First", TRCK="1/12") + mp3_frame() * 10),
+            SimpleUploadedFile("notes.mp3", b"n" * 50),
+        ]
+        with self.assertLogs("core.uploads", "INFO"):
+            response = self.client.post(f"/panel/media/{self.item.pk}/tracks/bulk/", {"audio_files": files})
+        self.assertRedirects(response, f"/panel/media/{self.item.pk}/tracks/", fetch_redirect_response=False)
+        # ID3 track number, then the file name prefix, then unnumbered; after the existing track
+        self.assertEqual(
+            list(self.item.tracks.values_list("title", "order")),
+            [("Intro", 1), ("First", 2), ("Lesson two", 3), ("Outro", 4), ("notes", 5)],
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.track_count, 5)
+        self.assertEqual(self.item.tracks_bytes, sum(self.item.tracks.values_list("size", flat=True)))
+        self.assertEqual(self.item.tracks_bytes, 100 + 300 + 200 + 50 + files[2].size)
+
+    def test_reorder_swaps_tracks(self):
+        second = self.add_track("Second", 2)
+        response = self.reorder([second.pk, self.intro.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.item.tracks.values_list("pk", "order")), [(second.pk, 1), (self.intro.pk, 2)])
+
+    def test_reorder_rejects_bad_lists(self):
+        second = self.add_track("Second", 2)
+        other = self.add_track("Elsewhere", 1, item=MediaItem.objects.create(title="Other", kind="audio"))
+        for order in ([self.intro.pk], [self.intro.pk, self.intro.pk], [self.intro.pk, other.pk],
+                      [self.intro.pk, second.pk, other.pk], ["one"]):
+            with self.subTest(order=order):
+                self.assertEqual(self.reorder(order).status_code, 400)
+        garbled = self.client.post(f"/panel/media/{self.item.pk}/tracks/reorder/", "{", content_type="application/json")
+        self.assertEqual(garbled.status_code, 400)
+        self.assertEqual(list(self.item.tracks.values_list("pk", "order")), [(self.intro.pk, 1), (second.pk, 2)])
+
+
+@no_page_cache
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(7):
+            # most items share a publish time (and, below, a created_at): id breaks the tie
+            published = now - timedelta(hours=min(i, 2))
+            MediaItem.objects.create(title=f"Item {i}", kind="audio", status="published", published_at=published)
+        MediaItem.objects.filter(published_at=now - timedelta(hours=2)).update(created_at=now)
+        MediaItem.objects.create(title="Draft", kind="audio")
+        cls.ordered = list(
+            MediaItem.objects.filter(status="published").order_by("-published_at", "-created_at", "-id")
+            .values_list("pk", flat=True)
+        )
+
+    def page(self, **cursor):
+        return paginate_keyset(MediaItem.objects.filter(status="published"), page_size=3, **cursor)
+
+    def ids(self, page):
+        return [item.pk for item in page]
+
+    def test_cursor_round_trip(self):
+        item = MediaItem.objects.get(pk=self.ordered[3])
+        self.assertEqual(decode_cursor(encode_cursor(item)), [item.published_at, item.created_at, item.pk])
+
+    def test_walk_forward_and_back(self):
+        first = self.page()
+        self.assertFalse(first.has_prev)
+        self.assertEqual(self.ids(first), self.ordered[:3])
+        second = self.page(after=first.next_cursor)
+        self.assertEqual(self.ids(second), self.ordered[3:6])
+        last = self.page(after=second.next_cursor)
+        self.assertEqual(self.ids(last), self.ordered[6:])
+        self.assertFalse(last.has_next)
+
+        back = self.page(before=last.prev_cursor)
+        self.assertEqual(self.ids(back), self.ordered[3:6])
+        self.assertEqual((back.has_prev, back.has_next), (True, True))
+        top = self.page(before=back.prev_cursor)
+        self.assertEqual(self.ids(top), self.ordered[:3])
+        self.assertFalse(top.has_prev)
+
+    def test_bad_cursors_mean_the_first_page(self):
+        def cursor(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+        item = MediaItem.objects.get(pk=self.ordered[0])
+        stamp = item.published_at.isoformat()
+        bad = [
+            "not base64!", cursor({"id": 1}), cursor([stamp, stamp]), cursor(["yesterday", stamp, 1]),
+            cursor(["2024-13-45T00:00:00+00:00", stamp, 1]), cursor([stamp[:19], stamp, 1]),
+            cursor([stamp, stamp, 10 ** 30]), cursor([stamp, stamp, True]), cursor([stamp, stamp, "1"]),
+            base64.urlsafe_b64encode(b"[" * 100000).decode(),
+        ]
+        first = self.client.get("/library/")
+        for value in bad:
+            with self.subTest(cursor=value[:40]):
+                self.assertIsNone(decode_cursor(value))
+                response = self.client.get("/library/", {"after": value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, first.content)
+
+
+@no_page_cache
+class PlaylistTests(TestCase):
+    def setUp(self):
+        use_temp_dirs(self, "MEDIA_ROOT")
+        playlist._cache.clear()
+        self.item = MediaItem.objects.create(title="Course", kind="audio", status="published")
+        for i in range(1, 4):
+            self.add_track(f"Part {i}", i)
+        self.url = f"/library/item/{self.item.slug}/playlist/"
+
+    def add_track(self, title, order):
+        MediaTrack.objects.create(
+            item=self.item, title=title, order=order, duration=60.0, audio_file=ContentFile(b"x" * 10, name="t.mp3"),
+        )
+
+    def test_manifest_is_one_query(self):
+        item = MediaItem.objects.get(pk=self.item.pk)
+        with self.assertNumQueries(1):
+            data = playlist.build_manifest(item)
+        self.assertEqual([t["title"] for t in data["tracks"]], ["Part 1", "Part 2", "Part 3"])
+        self.assertEqual(data["duration"], 180.0)
+
+    def test_lru_follows_updated_at(self):
+        item = MediaItem.objects.get(pk=self.item.pk)
+        etag, data, _ = playlist.get_manifest(item)
+        with self.assertNumQueries(0):
+            self.assertIs(playlist.get_manifest(item)[1], data)
+        self.add_track("Part 4", 4)  # bumps the item's updated_at
+        item = MediaItem.objects.get(pk=self.item.pk)
+        new_etag, new_data, _ = playlist.get_manifest(item)
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(len(new_data["tracks"]), 4)
+
+    def test_conditional_get(self):
+        with self.assertNumQueries(2):  # item + tracks
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["tracks"][0]["title"], "Part 1")
+        etag = response["ETag"]
+        with self.assertNumQueries(1):  # the manifest comes from the LRU
+            self.assertEqual(self.client.get(self.url)["ETag"], etag)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.add_track("Part 4", 4)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["tracks"]), 4)
+
+
+@no_page_cache
+class StoredHtmlTests(TestCase):
+    def setUp(self):
+        self.post = Post(title="Hello", content="# Hi\n\nSome *text*", status="published", published_at=timezone.now())
+        self.post.render_content()
+        self.post.save()
+
+    def test_unchanged_content_reuses_the_html(self):
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertFalse(post.html_is_stale())
+        with mock.patch("core.rendering.render_markdown") as render:
+            self.assertFalse(post.render_content())
+        render.assert_not_called()
+        self.assertIn("<em>text</em>", post.content_html)
+
+    def test_changed_content_or_renderer_re_renders(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.content = "Other *words*"
+        self.assertTrue(post.render_content())
+        self.assertIn("<em>words</em>", post.content_html)
+        self.assertEqual(post.excerpt, "Other words")
+
+        Post.objects.filter(pk=post.pk).update(render_version="old")
+        post = Post.objects.get(pk=post.pk)
+        self.assertTrue(post.html_is_stale())
+        self.assertTrue(post.render_content())
+        self.assertEqual(post.render_version, RENDERER_VERSION)
+
+    def test_post_detail_persists_lazy_render(self):
+        Post.objects.filter(pk=self.post.pk).update(content_html="", content_hash="", render_version="")
+        self.client.force_login(User.objects.create_user("reader", password="pw"))
+        url = f"/posts/{self.post.slug}/"
+        self.assertContains(self.client.get(url), "<em>text</em>")
+        stored = Post.objects.get(pk=self.post.pk)
+        self.assertFalse(stored.html_is_stale())
+        self.assertIn("<em>text</em>", stored.content_html)
+        with mock.patch("core.rendering.render_markdown") as render:
+            self.assertContains(self.client.get(url), "<em>text</em>")
+        render.assert_not_called()
+
+    def test_rebuild_command_only_touches_stale_rows(self):
+        stale = Post.objects.create(title="Old", content="**bold**")  # saved without rendering
+        out = io.StringIO()
+        call_command("rebuild_post_html", stdout=out)
+        self.assertIn("1/2 posts re-rendered", out.getvalue())
+        self.assertIn("<strong>bold</strong>", Post.objects.get(pk=stale.pk).content_html)
+        call_command("rebuild_post_html", "--force", stdout=out)
+        self.assertIn("2/2 posts re-rendered", out.getvalue())
+
+
+class ExcerptTests(SimpleTestCase):
+    def post(self, content):
+        post = Post(title="T", content=content)
+        post.render_content()
+        return post
+
+    def test_myanmar_text(self):
+        sentence = "မြန်မာစာ ဖတ်ရတာ အရမ်းကောင်းပါတယ်။ "
+        post = self.post(sentence * 200)
+        self.assertEqual(post.excerpt, Truncator(sentence * 10).chars(150))
+        self.assertTrue(post.excerpt.startswith("မြန်မာစာ ဖတ်ရတာ"))
+        self.assertTrue(post.excerpt.endswith("…"))
+        self.assertGreater(len(post.excerpt), 150)  # vowel signs don't count as characters
+        # few spaces: the estimate goes by length, not by the ~600 space-separated words
+        words = len(plain_text(post.content_html)) // 6
+        self.assertEqual(post.reading_time, math.ceil(words / 200))
+        self.assertGreater(post.reading_time, 3)
+
+    def test_excerpt_fits_the_column(self):
+        # "ပြင်ဆင်ချက်" is 11 code points, 8 of them counted by Truncator
+        excerpt = self.post("ပြင်ဆင်ချက်" * 100).excerpt
+        self.assertEqual(len(excerpt), Post._meta.get_field("excerpt").max_length)
+        self.assertTrue(excerpt.startswith("ပြင်ဆင်ချက်ပြင်"))
+        self.assertTrue(excerpt.endswith("…"))
+
+    def test_code_blocks_are_left_out(self):
+        post = self.post("Use `pip` to install.\n\n```python\nimport os\nprint(os.getcwd())\n```\n\n    indented = 1\n\nThen run it.")
+        self.assertEqual(post.excerpt, "Use pip to install. Then run it.")
+        self.assertEqual(post.reading_time, 1)
+
+    def test_truncation(self):
+        self.assertEqual(self.post("word " * 10).excerpt, ("word " * 10).strip())
+        post = self.post("# Heading\n\n" + "longword " * 100)
+        self.assertEqual(len(post.excerpt), 150)
+        self.assertTrue(post.excerpt.startswith("Heading longword"))
+        self.assertEqual(post.reading_time, 1)
+        self.assertEqual((self.post("").excerpt, self.post("").reading_time), ("", 0))
+
+
+class MarkdownEngineTests(SimpleTestCase):
+    def setUp(self):
+        rendering._html_cache.clear()
+
+    def test_repeat_render_is_a_cache_hit(self):
+        text = "# Cached\n\n| a | b |\n|---|---|\n| 1 | 2 |"
+        with mock.patch("core.rendering._render_uncached", wraps=rendering._render_uncached) as render:
+            html = render_markdown(text)
+            self.assertIs(render_markdown(text), html)
+        self.assertEqual(render.call_count, 1)
+        self.assertIn("<table>", html)
+
+    def test_engine_is_built_once_per_thread(self):
+        engine = rendering._engine()
+        self.assertIs(rendering._engine(), engine)
+        with mock.patch("core.rendering.md.Markdown") as build:
+            render_markdown("*new text*")
+        build.assert_not_called()
+        # reset between documents: a reference defined in one doesn't resolve in the next
+        self.assertIn('href="https://example.com"', render_markdown("[link][ref]\n\n[ref]: https://example.com"))
+        self.assertEqual(render_markdown("[link][ref]"), "<p>[link][ref]</p>")
+
+
+class HighlightCacheTests(SimpleTestCase):
+    def setUp(self):
+        rendering._html_cache.clear()
+        highlight.clear()
+        self.addCleanup(highlight.clear)
+
+    def test_hits_and_misses(self):
+        code = "```python\ndef f():\n    return 1\n```"
+        first = render_markdown("Intro\n\n" + code)
+        self.assertEqual((highlight.stats()["hits"], highlight.stats()["misses"]), (0, 1))
+        # another post (Markdown cache miss) with the same block: Pygments is skipped
+        second = render_markdown("Other intro\n\n" + code)
+        self.assertEqual((highlight.stats()["hits"], highlight.stats()["misses"]), (1, 1))
+        self.assertEqual(first.split("</p>")[1], second.split("</p>")[1])
+        self.assertIn('<span class="k">def</span>', second)
+        # same code, other language: a different key
+        render_markdown(code.replace("python", "ruby"))
+        self.assertEqual(highlight.stats()["misses"], 2)
+        self.assertEqual(highlight.stats()["entries"], 2)
+
+
+@no_page_cache
+class ServerTimingTests(TestCase):
+    HEADER = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries", tpl;dur=[\d.]+, md;dur=[\d.]+, total;dur=[\d.]+')
+
+    @classmethod
+    def setUpTestData(cls):
+        Post.objects.create(title="Hello", content="Hi", status="published", published_at=timezone.now())
+
+    def setUp(self):
+        timing.clear()
+        self.addCleanup(timing.clear)
+
+    def test_off_by_default(self):
+        self.assertFalse(self.client.get("/").has_header("Server-Timing"))
+
+    @override_settings(REQUEST_TIMING=True)
+    def test_header_and_samples(self):
+        with self.assertLogs("core.timing", "INFO") as logs:
+            response = self.client.get("/")
+        match = self.HEADER.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match.group(1)), 0)
+        self.assertIn(f"queries={match.group(1)}", logs.output[0])
+        self.assertEqual([row["count"] for row in timing.summary()], [1])
+
+    @override_settings(REQUEST_TIMING=True)
+    async def test_header_under_asgi(self):
+        with self.assertLogs("core.timing", "INFO"):
+            response = await self.async_client.get("/")
+        match = self.HEADER.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        self.assertGreater(int(match.group(1)), 0)
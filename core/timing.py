@@ -0,0 +1,239 @@
+"""Per-request timing: SQL, template and Markdown time, exposed as Server-Timing.
+
+Opt in with ``REQUEST_TIMING=1``. ``TimingMiddleware`` then measures every
+request and
+
+* adds ``Server-Timing: db;dur=..;desc="N queries", tpl;dur=.., md;dur=.., total;dur=..``
+  (shown in the browser dev tools, Network -> Timing),
+* logs one ``request timing ...`` line (key=value) to the ``core.timing`` logger,
+* keeps the last ``REQUEST_TIMING_SAMPLES`` requests per URL name in memory;
+  ``/panel/timings/`` shows their percentiles.
+
+Samples are per worker (like the highlight cache stats). Template time covers
+the outermost ``Template.render`` only, so includes and extends aren't counted
+twice; Markdown time is actual rendering (cache hits cost nothing).
+"""
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+class Timings:
+    __slots__ = ("sql_count", "sql_seconds", "template_seconds", "markdown_seconds", "template_depth")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.markdown_seconds = 0.0
+        self.template_depth = 0
+
+
+@contextmanager
+def track(part):
+    """Add the time spent in the block to ``<part>_seconds`` of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        attr = f"{part}_seconds"
+        setattr(timings, attr, getattr(timings, attr) + time.perf_counter() - started)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.sql_count += 1
+            timings.sql_seconds += time.perf_counter() - started
+
+
+def _attach_sql_wrapper():
+    connection.execute_wrappers.append(_sql_wrapper)
+
+
+def _detach_sql_wrapper():
+    connection.execute_wrappers.remove(_sql_wrapper)
+
+
+_installed = False
+
+
+def install():
+    """Wrap Template.render to time template rendering (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    from django.template.base import Template
+
+    original = Template.render
+
+    def render(self, context):
+        timings = _current.get()
+        if timings is None or timings.template_depth:
+            return original(self, context)
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            timings.template_depth -= 1
+            timings.template_seconds += time.perf_counter() - started
+
+    Template.render = render
+    _installed = True
+
+
+# ===== Per-URL-name samples =====
+class _Samples:
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, sample):
+        with self._lock:
+            samples = self._data.get(name)
+            if samples is None:
+                samples = self._data[name] = deque(maxlen=self.maxlen)
+            samples.append(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: list(samples) for name, samples in self._data.items()}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_samples = _Samples(getattr(settings, "REQUEST_TIMING_SAMPLES", 500))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(len(values) * pct / 100))
+    return values[rank - 1]
+
+
+def summary():
+    """Rows for the panel page, slowest p90 first. Times in milliseconds."""
+    rows = []
+    for name, samples in _samples.snapshot().items():
+        totals = sorted(s[0] for s in samples)
+        queries = sorted(s[1] for s in samples)
+        n = len(samples)
+        rows.append({
+            "name": name,
+            "count": n,
+            "p50": percentile(totals, 50),
+            "p90": percentile(totals, 90),
+            "p99": percentile(totals, 99),
+            "max": totals[-1],
+            "queries_avg": sum(queries) / n,
+            "queries_max": queries[-1],
+            "sql_avg": sum(s[2] for s in samples) / n,
+            "template_avg": sum(s[3] for s in samples) / n,
+            "markdown_avg": sum(s[4] for s in samples) / n,
+        })
+    rows.sort(key=lambda r: r["p90"], reverse=True)
+    return rows
+
+
+def clear():
+    _samples.clear()
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def enabled():
+    return getattr(settings, "REQUEST_TIMING", False)
+
+
+class TimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = Timings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_sql_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        # connections are per thread: the wrapper goes on the one in the
+        # request's sync thread, where sync_to_async runs the ORM and templates
+        # (the ContextVar is copied there with each call)
+        timings = Timings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        await sync_to_async(_attach_sql_wrapper)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_detach_sql_wrapper)()
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - started)
+
+    def finish(self, request, response, timings, total):
+        response["Server-Timing"] = (
+            f'db;dur={_ms(timings.sql_seconds)};desc="{timings.sql_count} queries", '
+            f"tpl;dur={_ms(timings.template_seconds)}, "
+            f"md;dur={_ms(timings.markdown_seconds)}, "
+            f"total;dur={_ms(total)}"
+        )
+
+        match = getattr(request, "resolver_match", None)
+        name = (match.view_name if match else None) or "-"
+        logger.info(
+            "request timing view=%s method=%s path=%s status=%d queries=%d sql_ms=%.1f "
+            "template_ms=%.1f markdown_ms=%.1f total_ms=%.1f",
+            name, request.method, request.path, response.status_code, timings.sql_count,
+            _ms(timings.sql_seconds), _ms(timings.template_seconds),
+            _ms(timings.markdown_seconds), _ms(total),
+        )
+        _samples.add(name, (
+            _ms(total), timings.sql_count, _ms(timings.sql_seconds),
+            _ms(timings.template_seconds), _ms(timings.markdown_seconds),
+        ))
+        return response
@@ -0,0 +1,89 @@
+"""Bulk track operations for the panel: multi-file upload and reordering.
+
+``add_tracks`` turns a batch of uploaded files (already streamed to temp files
+by core.uploads) into tracks with one INSERT. Titles come from the ID3 title,
+else the file name; the batch is ordered by ID3 track number, else a leading
+number in the file name ("03 - Intro.mp3"), else the file name, and appended
+after the item's existing tracks.
+
+``reorder_tracks`` renumbers all of an item's tracks 1..n in two UPDATEs:
+first every order is moved past the current maximum, then a single CASE
+update writes the final numbers, so uniq_media_track_order_per_item never sees
+two rows with the same order in the middle of the swap.
+"""
+import os
+import re
+
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When
+
+from .models_media import MediaTrack
+
+_LEADING_NUMBER = re.compile(r"^\s*(\d{1,4})(?:\s*[-._)\]]+\s*|\s+)")
+
+
+def _number(value):
+    """ID3 track number ("3", "03/12") -> 3, or None."""
+    m = re.match(r"\s*(\d+)", value or "")
+    return int(m.group(1)) if m else None
+
+
+def parse_filename(name):
+    """File name -> (leading track number or None, title): "03 - Lesson_one.mp3" -> (3, "Lesson one")."""
+    stem = os.path.splitext(os.path.basename(name or ""))[0]
+    m = _LEADING_NUMBER.match(stem)
+    number = int(m.group(1)) if m else None
+    title = (stem[m.end():] if m else stem).replace("_", " ").strip(" -.")
+    return number, (title or stem)[:200]
+
+
+def add_tracks(item, files):
+    """Create a track for each uploaded file in one transaction. Returns the new tracks."""
+    from . import signals
+
+    batch = []
+    for uploaded in files:
+        number, title = parse_filename(uploaded.name)
+        track = MediaTrack(item=item, title="", audio_file=uploaded, size=uploaded.size)
+        info = track.probe_audio()  # sets the title from ID3 when there is one
+        if info is not None:
+            number = _number(info.tags.get("track")) or number
+        track.title = track.title or title or MediaTrack.DEFAULT_TITLE
+        batch.append((number is None, number or 0, uploaded.name.lower(), track))
+    if not batch:
+        return []
+    batch.sort(key=lambda entry: entry[:3])
+    tracks = [entry[3] for entry in batch]
+
+    try:
+        with transaction.atomic():
+            last = item.tracks.aggregate(m=Max("order"))["m"] or 0
+            for i, track in enumerate(tracks, 1):
+                track.order = last + i
+            # FileField.pre_save moves each temp file into storage during the insert
+            MediaTrack.objects.bulk_create(tracks)
+            signals.tracks_added(item.pk, tracks)
+    except Exception:
+        for track in tracks:
+            if track.audio_file._committed:
+                track.audio_file.delete(save=False)
+        raise
+    return tracks
+
+
+def reorder_tracks(item, track_ids):
+    """Renumber the item's tracks 1..n following ``track_ids`` (every track exactly once)."""
+    from . import signals
+
+    with transaction.atomic():
+        current = dict(item.tracks.select_for_update().values_list("id", "order"))
+        if sorted(track_ids) != sorted(current):
+            raise ValueError("order must list every track of this item exactly once")
+        if not current:
+            return
+        # park every row above both the old and the new numbers, then write the new ones
+        shift = max(max(current.values()), len(track_ids))
+        tracks = MediaTrack.objects.filter(item=item)
+        tracks.update(order=F("order") + shift)
+        tracks.update(order=Case(*[When(pk=pk, then=Value(i)) for i, pk in enumerate(track_ids, 1)]))
+        signals.tracks_reordered(item.pk)
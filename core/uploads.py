@@ -0,0 +1,129 @@
+"""Upload handler that streams every file to a temp file on disk.
+
+Replaces Django's default memory + temp-file handler pair (settings
+FILE_UPLOAD_HANDLERS) so no upload is ever held in a worker's RAM. While the
+chunks arrive it computes a SHA-256, enforces MEDIA_UPLOAD_MAX_BYTES and the
+per-field type rules, and logs size / throughput / worker memory when the file
+is complete.
+
+Rejected files are skipped and the reason is appended to
+``request.upload_errors`` so the view can show it next to the form.
+"""
+import hashlib
+import logging
+import os
+import resource
+import time
+
+from django.conf import settings
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = {
+    "audio": {".mp3", ".m4a", ".aac", ".ogg", ".oga", ".wav", ".flac"},
+    "video": {".mp4", ".m4v", ".webm", ".mov"},
+    "image": {".jpg", ".jpeg", ".png", ".webp", ".gif"},
+}
+# form field name -> allowed kinds (fields not listed only get the size limit)
+FIELD_KINDS = {
+    "file": ("audio", "video"),
+    "audio_file": ("audio",),
+    "audio_files": ("audio",),  # bulk track upload
+    "cover_image": ("image",),
+}
+# first bytes that never belong in a media upload
+_BAD_SIGNATURES = (b"MZ", b"\x7fELF", b"#!", b"<?php", b"<!DOCTYPE", b"<html", b"<script")
+
+
+def _rss_kb():
+    """Current resident set size of this process in KB (Linux), else 0."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+
+
+def upload_error(request, message):
+    errors = getattr(request, "upload_errors", None)
+    if errors is None:
+        errors = request.upload_errors = []
+    errors.append(message)
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    chunk_size = 256 * 1024
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        # the parser closes handler.file when a file is skipped; make sure that
+        # can't be the previous (already completed) upload
+        if hasattr(self, "file"):
+            del self.file
+        self.max_bytes = getattr(settings, "MEDIA_UPLOAD_MAX_BYTES", 700 * 1024 * 1024)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+        self.started = time.monotonic()
+        self.rss_start = _rss_kb()
+        self.rss_peak = self.rss_start
+        self.checked_header = False
+
+        kinds = FIELD_KINDS.get(field_name)
+        if kinds:
+            ext = os.path.splitext(file_name or "")[1].lower()
+            allowed = set().union(*(ALLOWED_EXTENSIONS[k] for k in kinds))
+            if ext not in allowed:
+                upload_error(self.request, f"{file_name}: file type {ext or '(none)'} is not allowed here ({', '.join(sorted(allowed))})")
+                raise SkipFile()
+
+        if content_length is not None and content_length > self.max_bytes:
+            self._reject_size(file_name)
+
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+    def _reject_size(self, file_name):
+        limit_mb = self.max_bytes // (1024 * 1024)
+        upload_error(self.request, f"{file_name}: larger than the {limit_mb} MB upload limit")
+        raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.checked_header:
+            self.checked_header = True
+            if raw_data.lstrip()[:16].startswith(_BAD_SIGNATURES):
+                upload_error(self.request, f"{self.file_name}: content doesn't look like a media file")
+                raise SkipFile()
+
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._reject_size(self.file_name)
+
+        self.sha256.update(raw_data)
+        self.file.write(raw_data)
+        if self.received % (16 * self.chunk_size) < len(raw_data):
+            self.rss_peak = max(self.rss_peak, _rss_kb())
+        return None
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        elapsed = time.monotonic() - self.started
+        self.rss_peak = max(self.rss_peak, _rss_kb())
+        uploaded.sha256 = self.sha256.hexdigest()
+        uploaded.upload_stats = {
+            "bytes": file_size,
+            "seconds": round(elapsed, 3),
+            "rss_start_kb": self.rss_start,
+            "rss_peak_kb": self.rss_peak,
+            "process_peak_kb": _peak_rss_kb(),
+        }
+        logger.info(
+            "upload complete field=%s name=%s bytes=%d sha256=%s seconds=%.2f mb_per_s=%.1f "
+            "rss_start_kb=%d rss_peak_kb=%d rss_growth_kb=%d process_peak_kb=%d",
+            self.field_name, self.file_name, file_size, uploaded.sha256, elapsed,
+            (file_size / (1024 * 1024)) / elapsed if elapsed else 0.0,
+            self.rss_start, self.rss_peak, self.rss_peak - self.rss_start, _peak_rss_kb(),
+        )
+        return uploaded
@@ -5,6 +5,8 @@ from . import views_public
 from . import views_media
 from . import views_md
 from . import views_auth
+from . import views_search
+from . import views_uploads
 
 urlpatterns = [
     # Authentication (public)
@@ -19,24 +21,39 @@ urlpatterns = [
     path("panel/media/<int:pk>/delete/", views_media.panel_media_delete, name="panel_media_delete"),
 
     path("panel/media/<int:pk>/tracks/", views_media.panel_media_tracks, name="panel_media_tracks"),
+    path("panel/media/<int:pk>/tracks/bulk/", views_media.panel_media_tracks_bulk, name="panel_media_tracks_bulk"),
+    path("panel/media/<int:pk>/tracks/reorder/", views_media.panel_media_tracks_reorder, name="panel_media_tracks_reorder"),
     path("panel/media/track/<int:pk>/delete/", views_media.panel_media_track_delete, name="panel_media_track_delete"),
 
+    # Resumable chunked uploads (panel)
+    path("panel/uploads/", views_uploads.upload_init, name="upload_init"),
+    path("panel/uploads/<uuid:upload_id>/", views_uploads.upload_session, name="upload_session"),
+    path("panel/uploads/<uuid:upload_id>/finalize/", views_uploads.upload_finalize, name="upload_finalize"),
+
 
     # Media (public)
     path("library/", views_media.media_list, name="media_list"),
     path("library/<str:kind>/", views_media.media_list, name="media_list_kind"),
     path("library/item/<slug:slug>/", views_media.media_detail, name="media_detail"),
+    path("library/item/<slug:slug>/file/", views_media.media_file, name="media_file"),
+    path("library/item/<slug:slug>/peaks/", views_media.media_peaks, name="media_peaks"),
+    path("library/item/<slug:slug>/playlist/", views_media.media_playlist, name="media_playlist"),
+    path("library/track/<int:pk>/audio/", views_media.track_file, name="track_file"),
+    path("library/track/<int:pk>/peaks/", views_media.track_peaks, name="track_peaks"),
     
     # public
     path("", views.home, name="home"),
     path("posts/", views_public.posts_list, name="posts_list_public"),
     path("posts/<str:slug>/", views_public.post_detail, name="post_detail"),
+    path("search/", views_search.search_view, name="search"),
 
     # panel
     path("panel/", views.panel_dashboard, name="panel_dashboard"),
     path("panel/login/", views.panel_login, name="panel_login"),
     path("panel/logout/", views.panel_logout, name="panel_logout"),
 
+    path("panel/timings/", views.panel_timings, name="panel_timings"),
+
     path("panel/md-preview/", views_md.md_preview, name="md_preview"),
 
     # User management (superadmin only)
@@ -4,11 +4,28 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
 
+from . import roles
+from .aio import arender
+from .conditional import conditional, listing_stamp
+from .pagecache import page_cache
+from .stats import dashboard_stats
 
-def home(request):
+
+def _home_stamp(request):
+    from .models import Post
+    return listing_stamp(Post.objects.filter(status="published"))
+
+
+@page_cache(tags=("posts",))
+@conditional(_home_stamp)
+async def home(request):
     from .models import Post
-    posts = Post.objects.filter(status="published").order_by("-published_at", "-created_at")[:6]
-    return render(request, "home.html", {"posts": posts})
+    posts = (
+        Post.objects.filter(status="published")
+        .defer("content", "content_html")
+        .order_by("-published_at", "-created_at")[:6]
+    )
+    return await arender(request, "home.html", {"posts": [post async for post in posts]})
 
 
 def is_staff(user):
@@ -19,31 +36,44 @@ def is_superadmin(user):
     return user.is_authenticated and user.is_superuser
 
 
+@user_passes_test(is_staff, login_url="/panel/login/")
+def panel_timings(request):
+    from . import timing
+    if request.method == "POST":
+        timing.clear()
+        messages.success(request, "Timing samples cleared")
+        return redirect("/panel/timings/")
+    return render(request, "panel/timings.html", {
+        "enabled": timing.enabled(),
+        "rows": timing.summary(),
+    })
+
+
 @user_passes_test(is_staff, login_url="/panel/login/")
 def panel_dashboard(request):
     from .models import Post
-    from .models_media import MediaItem
     
-    # Get statistics
-    total_posts = Post.objects.count()
-    published_posts = Post.objects.filter(status="published").count()
-    draft_posts = Post.objects.filter(status="draft").count()
-    total_media = MediaItem.objects.count()
+    # Get statistics (cached, see core.stats)
+    stats = dashboard_stats()
     
     # Get recent posts
-    recent_posts = Post.objects.all().order_by("-updated_at")[:5]
+    recent_posts = (
+        Post.objects.select_related("author")
+        .defer("content", "content_html")
+        .order_by("-updated_at")[:5]
+    )
     
     # Check if user is editor
-    is_editor = request.user.groups.filter(name="Editor").exists()
+    is_editor = roles.EDITOR in roles.request_roles(request)
     
     context = {
-        "total_posts": total_posts,
-        "published_posts": published_posts,
-        "draft_posts": draft_posts,
-        "total_media": total_media,
+        **stats,
         "recent_posts": recent_posts,
         "is_editor": is_editor,
     }
+    if request.user.is_superuser:
+        from .highlight import stats as highlight_stats
+        context["highlight_stats"] = highlight_stats()
     
     return render(request, "panel/dashboard.html", context)
 
@@ -73,7 +103,7 @@ def panel_logout(request):
 # User Management Views (Superadmin only)
 @user_passes_test(is_superadmin, login_url="/panel/")
 def user_list(request):
-    users = User.objects.filter(is_staff=True).order_by("-date_joined")
+    users = User.objects.filter(is_staff=True).prefetch_related("groups").order_by("-date_joined")
     return render(request, "panel/users_list.html", {"users": users})
 
 
@@ -1,14 +1,31 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import user_passes_test
 from django.db.models import Max
+from django.utils.cache import get_conditional_response
 
 from .models_media import MediaItem, MediaTrack
+from .aio import aget_object_or_404, arender
+from .conditional import conditional, listing_stamp, row_stamp
 from .forms_media import MediaItemForm
+from .pagecache import add_tags, page_cache
+from .pagination import apaginate_keyset
+from .playlist import get_manifest, manifest_etag
+from .streaming import serve_file
+from .tracks import add_tracks, reorder_tracks
 
 def is_staff(user):
     return user.is_authenticated and user.is_staff
 
+def _add_upload_errors(request, form):
+    # files rejected while streaming (core.uploads) never reach the form
+    for msg in getattr(request, "upload_errors", []):
+        form.add_error(None, msg)
+
 # ===== Panel =====
 @user_passes_test(is_staff, login_url="/panel/login/")
 def panel_media_list(request):
@@ -20,6 +37,7 @@ def panel_media_list(request):
 def panel_media_new(request):
     if request.method == "POST":
         form = MediaItemForm(request.POST, request.FILES)
+        _add_upload_errors(request, form)
         if form.is_valid():
             form.save()
             return redirect("/panel/media/")
@@ -33,6 +51,7 @@ def panel_media_edit(request, pk):
     item = get_object_or_404(MediaItem, pk=pk)
     if request.method == "POST":
         form = MediaItemForm(request.POST, request.FILES, instance=item)
+        _add_upload_errors(request, form)
         if form.is_valid():
             form.save()
             return redirect("/panel/media/")
@@ -48,16 +67,89 @@ def panel_media_delete(request, pk):
     return redirect("/panel/media/")
 
 # ===== Public =====
-def media_list(request, kind=None):
-    qs = MediaItem.objects.filter(status="published").order_by("-published_at","-created_at")
+def _media_list_stamp(request, kind=None):
+    qs = MediaItem.objects.filter(status="published")
     if kind in ("audio","video"):
         qs = qs.filter(kind=kind)
-    return render(request, "media_list.html", {"items": qs, "kind": kind})
+    return listing_stamp(qs)
+
+def _media_stamp(request, slug):
+    # updated_at is also bumped by track changes (core.signals)
+    return row_stamp(MediaItem.objects.filter(status="published", slug=slug))
 
-def media_detail(request, slug):
+@page_cache(tags=("media",))
+@conditional(_media_list_stamp)
+async def media_list(request, kind=None):
+    qs = MediaItem.objects.filter(status="published")
+    if kind in ("audio","video"):
+        qs = qs.filter(kind=kind)
+    page = await apaginate_keyset(qs, after=request.GET.get("after", ""), before=request.GET.get("before", ""))
+    return await arender(request, "media_list.html", {"items": page, "page": page, "kind": kind})
+
+@page_cache()
+@conditional(_media_stamp)
+async def media_detail(request, slug):
+    item = await aget_object_or_404(MediaItem.objects.all(), status="published", slug=slug)
+    add_tags(request, f"media:{item.pk}")
+    # reads the item's tracks on a manifest cache miss
+    _, playlist, _ = await sync_to_async(get_manifest)(item)
+    return await arender(request, "media_detail.html", {"item": item, "playlist": playlist})
+
+@require_http_methods(["GET","HEAD"])
+def media_playlist(request, slug):
     item = get_object_or_404(MediaItem, status="published", slug=slug)
-    tracks = item.tracks.all()
-    return render(request, "media_detail.html", {"item": item, "tracks": tracks})
+    etag = manifest_etag(item)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    etag, _, body = get_manifest(item)
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=60"
+    return response
+
+
+# ===== Streaming (Range / 206) =====
+def _published(item):
+    return item.status == "published"
+
+def _visible(request, item):
+    # drafts stay playable for staff previewing in the panel
+    return _published(item) or is_staff(request.user)
+
+@require_http_methods(["GET","HEAD"])
+def media_file(request, slug):
+    item = get_object_or_404(MediaItem, slug=slug)
+    if not _visible(request, item) or not item.file:
+        raise Http404
+    return serve_file(request, item.file, public=_published(item))
+
+@require_http_methods(["GET","HEAD"])
+def track_file(request, pk):
+    track = get_object_or_404(MediaTrack.objects.select_related("item"), pk=pk)
+    if not _visible(request, track.item) or not track.audio_file:
+        raise Http404
+    return serve_file(request, track.audio_file, public=_published(track.item))
+
+def _peaks_file(field_file):
+    from django.db.models.fields.files import FieldFile
+    from .waveform import peaks_name
+    return FieldFile(field_file.instance, field_file.field, peaks_name(field_file.name))
+
+@require_http_methods(["GET","HEAD"])
+def media_peaks(request, slug):
+    item = get_object_or_404(MediaItem, slug=slug)
+    if not _visible(request, item) or not item.file:
+        raise Http404
+    return serve_file(request, _peaks_file(item.file), content_type="application/octet-stream", public=_published(item))
+
+@require_http_methods(["GET","HEAD"])
+def track_peaks(request, pk):
+    track = get_object_or_404(MediaTrack.objects.select_related("item").defer("seek_index"), pk=pk)
+    if not _visible(request, track.item) or not track.audio_file:
+        raise Http404
+    return serve_file(request, _peaks_file(track.audio_file), content_type="application/octet-stream",
+                      public=_published(track.item))
 
 
 @user_passes_test(is_staff, login_url="/panel/login/")
@@ -66,7 +158,7 @@ def panel_media_tracks(request, pk):
     item = get_object_or_404(MediaItem, pk=pk)
 
     if request.method == "POST":
-        title = (request.POST.get("title") or "").strip() or "Track"
+        title = (request.POST.get("title") or "").strip() or MediaTrack.DEFAULT_TITLE
         order_raw = (request.POST.get("order") or "").strip()
         audio = request.FILES.get("audio_file")
 
@@ -80,8 +172,45 @@ def panel_media_tracks(request, pk):
             MediaTrack.objects.create(item=item, title=title, order=order, audio_file=audio)
             return redirect("panel_media_tracks", pk=item.pk)
 
-    tracks = item.tracks.all()
-    return render(request, "panel/media_tracks.html", {"item": item, "tracks": tracks})
+    return _tracks_page(request, item)
+
+
+def _tracks_page(request, item, errors=()):
+    tracks = item.tracks.defer("seek_index")
+    return render(request, "panel/media_tracks.html", {
+        "item": item,
+        "tracks": tracks,
+        "upload_errors": [*getattr(request, "upload_errors", []), *errors],
+    })
+
+
+@user_passes_test(is_staff, login_url="/panel/login/")
+@require_http_methods(["POST"])
+def panel_media_tracks_bulk(request, pk):
+    """Many audio files in one POST (field ``audio_files``); see core.tracks.add_tracks."""
+    item = get_object_or_404(MediaItem, pk=pk)
+    files = request.FILES.getlist("audio_files")
+    if files:
+        add_tracks(item, files)
+    if getattr(request, "upload_errors", None) or not files:
+        return _tracks_page(request, item, errors=() if files else ["Audio file တွေရွေးပါ။"])
+    return redirect("panel_media_tracks", pk=item.pk)
+
+
+@user_passes_test(is_staff, login_url="/panel/login/")
+@require_http_methods(["POST"])
+def panel_media_tracks_reorder(request, pk):
+    """JSON ``{"order": [track id, ...]}`` -> tracks renumbered 1..n in that order."""
+    item = get_object_or_404(MediaItem, pk=pk)
+    try:
+        track_ids = [int(t) for t in json.loads(request.body or b"{}")["order"]]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({"error": 'expected {"order": [track ids]}'}, status=400)
+    try:
+        reorder_tracks(item, track_ids)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"order": track_ids})
 
 
 @user_passes_test(is_staff, login_url="/panel/login/")
@@ -1,10 +1,11 @@
 from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-from django.utils.text import slugify
 from django.contrib import messages
 
 from .models import Post
+from .search import search
+from .slugs import make_slug
 
 
 def is_staff(user):
@@ -16,23 +17,19 @@ def can_delete_posts(user):
     return user.is_authenticated and user.is_superuser
 
 
-def make_slug(raw: str) -> str:
-    raw = (raw or "").strip()
-    # allow unicode, replace spaces with hyphen, remove weird chars
-    s = slugify(raw, allow_unicode=True)
-    return s or raw.replace(" ", "-")
-
-
 @user_passes_test(is_staff, login_url="/panel/login/")
 def post_list(request):
     q = request.GET.get("q", "").strip()
     status = request.GET.get("status", "").strip()
 
-    posts = Post.objects.all()
-    if q:
-        posts = posts.filter(title__icontains=q)
+    posts = Post.objects.defer("content", "content_html")
     if status in ("draft", "published"):
         posts = posts.filter(status=status)
+    if q:
+        # full-text over title + body, drafts included; keep rank order
+        hits = search(q, kinds=("post",), published_only=False, page_size=200).hits
+        rank = {pk: i for i, (kind, pk) in enumerate(hits)}
+        posts = sorted(posts.filter(pk__in=rank), key=lambda p: rank[p.pk])
 
     return render(request, "panel/posts_list.html", {
         "posts": posts, 
@@ -53,20 +50,19 @@ def post_create(request):
         video_url = request.POST.get("video_url", "").strip()
         cover_image = request.FILES.get("cover_image")
 
-        if not title:
+        if getattr(request, "upload_errors", None):
+            error = "; ".join(request.upload_errors)
+        elif not title:
             error = "Title မဖြစ်မနေလိုပါတယ်"
         else:
-            if not slug:
-                slug = make_slug(title)
-            else:
+            # an explicit slug must be free; without one Post.save picks title, title-2, ...
+            if slug:
                 slug = make_slug(slug)
-
-            # slug unique check
-            if Post.objects.filter(slug=slug).exists():
-                error = "Slug တူနေပါတယ် (တစ်ခုထဲပဲရှိရမယ်) — slug ကိုပြောင်းပါ"
+                if Post.objects.filter(slug=slug).exists():
+                    error = "Slug တူနေပါတယ် (တစ်ခုထဲပဲရှိရမယ်) — slug ကိုပြောင်းပါ"
 
         if not error:
-            Post.objects.create(
+            post = Post(
                 title=title,
                 slug=slug,
                 content=content,
@@ -76,6 +72,8 @@ def post_create(request):
                 author=request.user,
                 published_at=timezone.now() if status == "published" else None,
             )
+            post.render_content()
+            post.save()
             messages.success(request, f"Post '{title}' created successfully!")
             return redirect("/panel/posts/")
 
@@ -98,15 +96,20 @@ def post_edit(request, post_id):
             error = "Title မဖြစ်မနေလိုပါတယ်"
         else:
             post.title = title
-            new_slug = make_slug(slug or title)
-            if Post.objects.exclude(id=post.id).filter(slug=new_slug).exists():
-                error = "Slug တူနေပါတယ် — slug ကိုပြောင်းပါ"
+            if not slug:
+                post.slug = ""  # re-derived from the title on save
             else:
-                post.slug = new_slug
+                new_slug = make_slug(slug)
+                if Post.objects.exclude(id=post.id).filter(slug=new_slug).exists():
+                    error = "Slug တူနေပါတယ် — slug ကိုပြောင်းပါ"
+                else:
+                    post.slug = new_slug
 
         cover_image = request.FILES.get("cover_image")
         if cover_image:
             post.cover_image = cover_image
+        if getattr(request, "upload_errors", None):
+            error = "; ".join(request.upload_errors)
 
         if not error:
             if post.status == "published" and post.published_at is None:
@@ -114,6 +117,7 @@ def post_edit(request, post_id):
             if post.status == "draft":
                 post.published_at = None
 
+            post.render_content()
             post.save()
             messages.success(request, f"Post '{post.title}' updated successfully!")
             return redirect("/panel/posts/")
@@ -1,65 +1,36 @@
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, get_object_or_404
+from asgiref.sync import sync_to_async
+from .aio import aget_object_or_404, arender, login_required
+from .conditional import conditional, listing_stamp, row_stamp
 from .models import Post
-import markdown as md
-import bleach
+from .pagination import apaginate_keyset
+from .rendering import RENDERER_VERSION
 
-ALLOWED_TAGS = bleach.sanitizer.ALLOWED_TAGS.union({
-    "p", "div", "span", "pre", "code",
-    "h1", "h2", "h3", "h4", "h5", "h6",
-    "ul", "ol", "li",
-    "blockquote",
-    "br", "hr",
-    "table", "thead", "tbody", "tr", "th", "td",
-    "a",
-    "input",
-})
-ALLOWED_ATTRS = {
-    **bleach.sanitizer.ALLOWED_ATTRIBUTES,
-    "a": ["href", "title", "rel", "target"],
-    "div": ["class"],
-    "span": ["class"],
-    "p": ["class"],
-    "ul": ["class"],
-    "ol": ["class"],
-    "li": ["class"],
-    "pre": ["class"],
-    "code": ["class"],
-    "input": ["type", "checked", "disabled", "class"],
-    "h1": ["id"], "h2": ["id"], "h3": ["id"], "h4": ["id"], "h5": ["id"], "h6": ["id"],
-    "th": ["colspan", "rowspan"],
-    "td": ["colspan", "rowspan"],
-}
-ALLOWED_PROTOCOLS = ["http", "https", "mailto"]
+def _posts_stamp(request):
+    return listing_stamp(Post.objects.filter(status="published"))
 
-@login_required(login_url="/login/")
-def posts_list(request):
-    posts = Post.objects.filter(status="published").order_by("-published_at", "-created_at")
-    return render(request, "posts_list.html", {"posts": posts})
+def _post_stamp(request, slug):
+    # the renderer version covers lazily re-rendered HTML (which doesn't touch updated_at)
+    return row_stamp(Post.objects.filter(status="published", slug=slug), RENDERER_VERSION)
 
 @login_required(login_url="/login/")
-def post_detail(request, slug):
-    post = get_object_or_404(Post, status="published", slug=slug)
-    html = md.markdown(
-        post.content or "",
-        extensions=[
-            "fenced_code", "tables", "nl2br",
-            "codehilite",
-            "admonition",
-            "attr_list",
-            "md_in_html",
-            "pymdownx.tasklist",
-        ],
-        extension_configs={
-            "codehilite": {"guess_lang": False, "css_class": "codehilite"},
-            "pymdownx.tasklist": {"custom_checkbox": True, "clickable_checkbox": False},
-        },
-    )
-    safe_html = bleach.clean(
-        html,
-        tags=ALLOWED_TAGS,
-        attributes=ALLOWED_ATTRS,
-        protocols=ALLOWED_PROTOCOLS,
-        strip=True,
+@conditional(_posts_stamp)
+async def posts_list(request):
+    page = await apaginate_keyset(
+        Post.objects.filter(status="published").defer("content", "content_html"),
+        after=request.GET.get("after", ""),
+        before=request.GET.get("before", ""),
     )
-    return render(request, "post_detail.html", {"post": post, "content_html": safe_html})
+    return await arender(request, "posts_list.html", {"posts": page, "page": page})
+
+@login_required(login_url="/login/")
+@conditional(_post_stamp)
+async def post_detail(request, slug):
+    post = await aget_object_or_404(Post.objects.all(), status="published", slug=slug)
+    # content_html is rendered on save; only re-render rows saved before that
+    # (or by an older renderer) and persist the result for the next hit.
+    # Markdown is CPU work: keep it off the event loop.
+    if await sync_to_async(post.render_content)():
+        await Post.objects.filter(pk=post.pk).aupdate(
+            **{name: getattr(post, name) for name in Post.RENDER_FIELDS}
+        )
+    return await arender(request, "post_detail.html", {"post": post, "content_html": post.content_html})
@@ -0,0 +1,17 @@
+from django.shortcuts import render
+
+from .search import search, load_hits
+
+
+def search_view(request):
+    q = request.GET.get("q", "").strip()
+    page_raw = request.GET.get("page", "")
+    # isdecimal, not isdigit: int() rejects digits like "²"; search() caps the page
+    page_num = int(page_raw) if page_raw.isdecimal() else 1
+
+    # posts are members-only (see views_public), media is public
+    kinds = ("post", "media") if request.user.is_authenticated else ("media",)
+
+    page = search(q, kinds=kinds, page=page_num)
+    results = load_hits(page.hits)
+    return render(request, "search.html", {"q": q, "page": page, "results": results})
@@ -0,0 +1,210 @@
+"""Resumable chunked uploads for large media files (panel only).
+
+    POST   /panel/uploads/                  init  -> {"id", "offset", "chunk_size"}
+    GET    /panel/uploads/<id>/             status (resume point) -> {"offset", ...}
+    PUT    /panel/uploads/<id>/             append raw body at header Upload-Offset
+    POST   /panel/uploads/<id>/finalize/    verify + attach
+    DELETE /panel/uploads/<id>/             abort
+
+Each request handles at most one chunk (CHUNKED_UPLOAD_CHUNK_BYTES), so a
+dropped connection costs one chunk, not the whole file, and no request holds
+a worker for minutes. A chunk may carry ``Upload-Checksum: sha256 <hex>``;
+the whole file is checked against the sha256 given at init (if any).
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.db import transaction
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods, require_POST
+
+from .models_media import MediaItem, MediaTrack, UploadSession
+from .uploads import ALLOWED_EXTENSIONS, FIELD_KINDS
+
+READ_SIZE = 256 * 1024
+
+
+def is_staff(user):
+    return user.is_authenticated and user.is_staff
+
+
+def _error(message, code=400, **extra):
+    return JsonResponse({"error": message, **extra}, status=code)
+
+
+def _session_json(s):
+    return {
+        "id": str(s.id),
+        "offset": s.received,
+        "size": s.size,
+        "status": s.status,
+        "chunk_size": settings.CHUNKED_UPLOAD_CHUNK_BYTES,
+    }
+
+
+def _params(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@user_passes_test(is_staff, login_url="/panel/login/")
+@require_POST
+def upload_init(request):
+    data = _params(request)
+    if data is None:
+        return _error("invalid JSON")
+
+    target = data.get("target", "")
+    filename = os.path.basename(str(data.get("filename", "")).strip())
+    size_raw = str(data.get("size", ""))
+    sha256 = str(data.get("sha256", "")).strip().lower()
+
+    if target not in dict(UploadSession.TARGET_CHOICES):
+        return _error("target must be media_file or track")
+    if not filename or not size_raw.isdigit():
+        return _error("filename and size are required")
+    size = int(size_raw)
+    if size > settings.MEDIA_UPLOAD_MAX_BYTES:
+        return _error(f"larger than the {settings.MEDIA_UPLOAD_MAX_BYTES // (1024 * 1024)} MB upload limit", code=413)
+    if sha256 and len(sha256) != 64:
+        return _error("sha256 must be 64 hex characters")
+
+    field = "audio_file" if target == "track" else "file"
+    allowed = set().union(*(ALLOWED_EXTENSIONS[k] for k in FIELD_KINDS[field]))
+    if os.path.splitext(filename)[1].lower() not in allowed:
+        return _error(f"file type not allowed ({', '.join(sorted(allowed))})")
+
+    item = None
+    item_id = str(data.get("item", "") or "")
+    if item_id:
+        if not item_id.isdigit():
+            return _error("item must be a media item id")
+        item = get_object_or_404(MediaItem, pk=int(item_id))
+    if target == "track" and item is None:
+        return _error("item is required for track uploads")
+
+    order_raw = str(data.get("order", "") or "")
+    session = UploadSession.objects.create(
+        target=target,
+        item=item,
+        filename=filename,
+        size=size,
+        sha256=sha256,
+        track_title=str(data.get("title", "") or "").strip()[:200],
+        track_order=int(order_raw) if order_raw.isdigit() else None,
+        created_by=request.user,
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(session.part_path, "wb").close()
+    return JsonResponse(_session_json(session), status=201)
+
+
+@user_passes_test(is_staff, login_url="/panel/login/")
+@require_http_methods(["GET", "PUT", "DELETE"])
+def upload_session(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id)
+
+    if request.method == "GET":
+        return JsonResponse(_session_json(session))
+
+    if request.method == "DELETE":
+        session.discard_part()
+        session.delete()
+        return JsonResponse({"deleted": True})
+
+    # PUT: append one chunk
+    if session.status != "uploading":
+        return _error("upload already finalized", code=409, **_session_json(session))
+
+    offset_raw = request.headers.get("Upload-Offset", "")
+    if not offset_raw.isdigit():
+        return _error("Upload-Offset header required")
+    offset = int(offset_raw)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if offset != session.received:
+            # client is out of sync (e.g. retried a chunk that did land): resume from ours
+            return _error("offset mismatch", code=409, **_session_json(session))
+
+        length = int(request.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return _error("empty chunk")
+        if length > settings.CHUNKED_UPLOAD_CHUNK_BYTES:
+            return _error("chunk too large", code=413, **_session_json(session))
+        if offset + length > session.size:
+            return _error("chunk runs past declared size", code=416, **_session_json(session))
+
+        expected = ""
+        checksum = request.headers.get("Upload-Checksum", "")
+        if checksum:
+            algo, _, value = checksum.partition(" ")
+            if algo.lower() != "sha256":
+                return _error("only sha256 chunk checksums are supported")
+            expected = value.strip().lower()
+
+        # stream the body straight to disk at the offset; roll back on failure
+        h = hashlib.sha256()
+        remaining = length
+        with open(session.part_path, "r+b") as f:
+            f.seek(offset)
+            while remaining > 0:
+                block = request.read(min(READ_SIZE, remaining))
+                if not block:
+                    break
+                h.update(block)
+                f.write(block)
+                remaining -= len(block)
+            if remaining or (expected and h.hexdigest() != expected):
+                f.truncate(offset)
+                if remaining:
+                    return _error("connection closed mid-chunk", **_session_json(session))
+                return _error("chunk checksum mismatch", code=422, **_session_json(session))
+            f.truncate()
+        session.received = offset + length
+        session.save(update_fields=["received", "updated_at"])
+
+    return JsonResponse(_session_json(session))
+
+
+@user_passes_test(is_staff, login_url="/panel/login/")
+@require_POST
+def upload_finalize(request, upload_id):
+    with transaction.atomic():
+        session = get_object_or_404(UploadSession.objects.select_for_update(), pk=upload_id)
+        if session.status == "uploading":
+            if session.received != session.size or os.path.getsize(session.part_path) != session.size:
+                return _error("upload incomplete", code=409, **_session_json(session))
+            digest = _file_sha256(session.part_path)
+            if session.sha256 and digest != session.sha256:
+                session.discard_part()
+                session.delete()
+                return _error("checksum mismatch, upload discarded", code=422)
+            session.sha256 = digest
+            session.status = "complete"
+            session.save(update_fields=["sha256", "status", "updated_at"])
+
+        result = {"id": str(session.id), "sha256": session.sha256}
+        if session.status == "complete" and session.item_id:
+            obj = session.attach()
+            if isinstance(obj, MediaTrack):
+                result["track"] = obj.pk
+            result["url"] = obj.stream_url
+        result["status"] = session.status
+    return JsonResponse(result)
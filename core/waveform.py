@@ -0,0 +1,136 @@
+"""Waveform peaks for the audio player's scrub bar.
+
+Peaks are stored next to the audio file as ``<audio name>.peaks``: PEAK_BUCKETS
+unsigned bytes (0-255), each the loudest point of its slice of the track. The
+player fetches them from /library/track/<pk>/peaks/ (or the item's) instead of
+downloading and decoding the whole MP3 in the browser.
+
+Audio is decoded once with ffmpeg (settings.FFMPEG_BINARY) when it's
+available. Without it, MP3s fall back to core.mp3.global_gains(), which reads
+loudness from the frame side info without decoding.
+
+``schedule(field_file)`` runs the job on a background thread after the saving
+transaction commits; ``build_peaks`` is the synchronous version used by the
+build_waveforms command.
+"""
+import logging
+import shutil
+import subprocess
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PEAK_BUCKETS = 1024
+DECODE_RATE = 4000  # Hz; plenty for an overview
+WINDOW = 40         # samples per raw peak (10 ms at DECODE_RATE)
+
+_executor = None
+
+
+def peaks_name(audio_name):
+    return f"{audio_name}.peaks"
+
+
+def has_peaks(field_file):
+    return bool(field_file) and field_file.storage.exists(peaks_name(field_file.name))
+
+
+def delete_peaks(field_file):
+    if field_file:
+        try:
+            field_file.storage.delete(peaks_name(field_file.name))
+        except OSError:
+            pass
+
+
+def _downsample(values, buckets=PEAK_BUCKETS):
+    """Max-pool ``values`` into ``buckets`` bytes, scaled so the loudest is 255."""
+    if not values:
+        return b""
+    n = len(values)
+    pooled = []
+    for i in range(min(buckets, n)):
+        start = i * n // buckets
+        pooled.append(max(values[start:max(start + 1, (i + 1) * n // buckets)]))
+    top = max(pooled) or 1
+    return bytes(min(255, round(v * 255 / top)) for v in pooled)
+
+
+def _ffmpeg_peaks(path):
+    binary = getattr(settings, "FFMPEG_BINARY", "") or shutil.which("ffmpeg")
+    if not binary:
+        return None
+    cmd = [binary, "-v", "error", "-i", path, "-ac", "1", "-ar", str(DECODE_RATE), "-f", "s16le", "-"]
+    peaks = []
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        while True:
+            block = proc.stdout.read(WINDOW * 2 * 1024)
+            if not block:
+                break
+            samples = array("h")
+            samples.frombytes(block[:len(block) - len(block) % 2])
+            for i in range(0, len(samples), WINDOW):
+                window = samples[i:i + WINDOW]
+                peaks.append(max(max(window), -min(window)))
+    if proc.returncode != 0:
+        logger.warning("ffmpeg failed (%s) for %s", proc.returncode, path)
+        return None
+    return peaks
+
+
+def _gain_peaks(path):
+    from .mp3 import global_gains
+    with open(path, "rb") as f:
+        result = global_gains(f)
+    if not result:
+        return None
+    gains, _ = result
+    top = max(gains)
+    # gain steps are 1.5 dB; show the top 60 dB on a dB scale (quiet passages stay visible)
+    return [max(0.0, 1 - (top - g) / 40) for g in gains]
+
+
+def build_peaks(field_file):
+    """Decode ``field_file`` and store its peaks file. Returns the peaks bytes or None."""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        return None
+    values = _ffmpeg_peaks(path)
+    if values is None and path.lower().endswith(".mp3"):
+        values = _gain_peaks(path)
+    if not values:
+        logger.info("no waveform for %s (no decoder for this format)", field_file.name)
+        return None
+
+    data = _downsample(values)
+    name = peaks_name(field_file.name)
+    field_file.storage.delete(name)
+    field_file.storage.save(name, ContentFile(data))
+    return data
+
+
+def _run(field_file):
+    # touches only storage + ffmpeg, no database, so it's safe off the request thread
+    try:
+        build_peaks(field_file)
+    except Exception:
+        logger.exception("waveform job failed for %s", field_file.name)
+
+
+def schedule(field_file):
+    """Build peaks on a background thread once the current transaction commits."""
+    global _executor
+    if not field_file or has_peaks(field_file):
+        return
+    if not getattr(settings, "WAVEFORM_BACKGROUND", True):
+        transaction.on_commit(lambda: _run(field_file))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="waveform")
+    transaction.on_commit(lambda: _executor.submit(_run, field_file))
@@ -135,8 +135,8 @@ PYEOF
 python3 manage.py collectstatic --noinput
 
 # Fix database permissions for SQLite
-chown www-data:www-data db.sqlite3
-chmod 664 db.sqlite3
+chown www-data:www-data db.sqlite3*
+chmod 664 db.sqlite3*
 chown www-data:www-data .
 chmod 775 .
 
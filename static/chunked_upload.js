@@ -0,0 +1,90 @@
+// Resumable chunked uploads against /panel/uploads/ (core/views_uploads.py).
+// Progress is remembered in localStorage per file, so picking the same file
+// again after a dropped connection continues from the last stored chunk.
+(function () {
+  function csrfToken() {
+    const m = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return m ? decodeURIComponent(m[1]) : "";
+  }
+
+  function fileKey(file, opts) {
+    return ["chunked", opts.target, opts.item || "", file.name, file.size, file.lastModified].join(":");
+  }
+
+  async function sha256Hex(buf) {
+    if (!(window.crypto && crypto.subtle)) return "";
+    const digest = await crypto.subtle.digest("SHA-256", buf);
+    return [...new Uint8Array(digest)].map(b => b.toString(16).padStart(2, "0")).join("");
+  }
+
+  async function api(url, options) {
+    const res = await fetch(url, Object.assign({
+      credentials: "same-origin",
+      headers: { "X-CSRFToken": csrfToken() },
+    }, options));
+    let data = {};
+    try { data = await res.json(); } catch (e) { /* non-JSON error page */ }
+    return { res, data };
+  }
+
+  async function resumeOrInit(file, opts) {
+    const key = fileKey(file, opts);
+    const saved = localStorage.getItem(key);
+    if (saved) {
+      const { res, data } = await api(`/panel/uploads/${saved}/`, { method: "GET" });
+      if (res.ok && data.status === "uploading") return data;
+      localStorage.removeItem(key);
+    }
+    const fd = new FormData();
+    fd.append("target", opts.target);
+    fd.append("filename", file.name);
+    fd.append("size", String(file.size));
+    if (opts.item) fd.append("item", String(opts.item));
+    if (opts.title) fd.append("title", opts.title);
+    if (opts.order) fd.append("order", String(opts.order));
+    const { res, data } = await api("/panel/uploads/", { method: "POST", body: fd });
+    if (!res.ok) throw new Error(data.error || `init failed (${res.status})`);
+    localStorage.setItem(key, data.id);
+    return data;
+  }
+
+  window.chunkedUpload = async function (file, opts) {
+    const onProgress = opts.onProgress || function () {};
+    let session = await resumeOrInit(file, opts);
+    let offset = session.offset;
+    let retries = 0;
+
+    while (offset < file.size) {
+      const chunk = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+      const buf = await chunk.arrayBuffer();
+      const headers = { "X-CSRFToken": csrfToken(), "Upload-Offset": String(offset) };
+      const digest = await sha256Hex(buf);
+      if (digest) headers["Upload-Checksum"] = "sha256 " + digest;
+
+      let res, data;
+      try {
+        ({ res, data } = await api(`/panel/uploads/${session.id}/`, { method: "PUT", headers, body: buf }));
+      } catch (e) {
+        res = null;
+      }
+
+      if (res && res.ok) {
+        offset = data.offset;
+        retries = 0;
+        onProgress(offset, file.size);
+        continue;
+      }
+      if (res && res.status === 409 && typeof data.offset === "number") {
+        offset = data.offset;   // server knows better; resume from there
+        continue;
+      }
+      if (++retries > 5) throw new Error((data && data.error) || "upload failed");
+      await new Promise(r => setTimeout(r, 1000 * retries));
+    }
+
+    const { res, data } = await api(`/panel/uploads/${session.id}/finalize/`, { method: "POST" });
+    localStorage.removeItem(fileKey(file, opts));
+    if (!res.ok) throw new Error(data.error || `finalize failed (${res.status})`);
+    return data;
+  };
+})();
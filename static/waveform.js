@@ -0,0 +1,80 @@
+// Waveform scrub bar for <audio>: draws the precomputed peaks served by
+// /library/.../peaks/ (core/waveform.py: one byte 0-255 per bucket) and seeks
+// on click. Peaks are cached per URL; a missing file just hides the canvas.
+(function () {
+  const cache = new Map();
+
+  function fetchPeaks(url) {
+    if (!cache.has(url)) {
+      cache.set(url, fetch(url, { credentials: "same-origin" })
+        .then(res => (res.ok ? res.arrayBuffer() : null))
+        .then(buf => (buf && buf.byteLength ? new Uint8Array(buf) : null))
+        .catch(() => null));
+    }
+    return cache.get(url);
+  }
+
+  window.Waveform = function (canvas, audio) {
+    let peaks = null;
+    let current = "";
+    let knownDuration = 0;
+
+    function draw() {
+      if (!peaks) return;
+      const dpr = window.devicePixelRatio || 1;
+      const w = canvas.clientWidth, h = canvas.clientHeight;
+      if (canvas.width !== w * dpr || canvas.height !== h * dpr) {
+        canvas.width = w * dpr;
+        canvas.height = h * dpr;
+      }
+      const ctx = canvas.getContext("2d");
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      ctx.clearRect(0, 0, w, h);
+
+      const duration = audio.duration || knownDuration;
+      const played = duration ? audio.currentTime / duration : 0;
+      const styles = getComputedStyle(canvas);
+      const bars = Math.max(1, Math.floor(w / 3));
+      for (let i = 0; i < bars; i++) {
+        const from = Math.floor(i * peaks.length / bars);
+        const to = Math.max(from + 1, Math.floor((i + 1) * peaks.length / bars));
+        let v = 0;
+        for (let j = from; j < to; j++) v = Math.max(v, peaks[j]);
+        const bh = Math.max(1, (v / 255) * h);
+        ctx.fillStyle = i / bars < played ? styles.getPropertyValue("--wave-played").trim() || "#667eea"
+                                          : styles.getPropertyValue("--wave-idle").trim() || "rgba(127,127,127,.45)";
+        ctx.fillRect(i * 3, (h - bh) / 2, 2, bh);
+      }
+    }
+
+    canvas.addEventListener("click", (ev) => {
+      const duration = audio.duration || knownDuration;
+      if (!duration) return;
+      const rect = canvas.getBoundingClientRect();
+      audio.currentTime = ((ev.clientX - rect.left) / rect.width) * duration;
+      draw();
+    });
+    audio.addEventListener("timeupdate", draw);
+    audio.addEventListener("seeked", draw);
+    window.addEventListener("resize", draw);
+
+    return {
+      load(url, duration) {
+        current = url;
+        knownDuration = parseFloat(duration) || 0;
+        peaks = null;
+        canvas.hidden = true;
+        if (!url) return;
+        fetchPeaks(url).then(data => {
+          if (current !== url || !data) return;
+          peaks = data;
+          canvas.hidden = false;
+          draw();
+        });
+      },
+      prefetch(url) {
+        if (url) fetchPeaks(url);
+      },
+    };
+  };
+})();